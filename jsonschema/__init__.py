@@ -45,7 +45,9 @@ Parsing a more complex JSON document.
 >>> jsonschema.validate(data,schema)
 
 Handling validation errors
-ValueErrors are thrown when validation errors occur.
+ValidationErrors, a subclass of ValueError, are thrown when validation
+errors occur. They hold the schema property that failed, the path of the
+invalid field, its value and the limit it was checked against.
 
 >>> import jsonschema
 >>> try:
@@ -54,6 +56,18 @@ ValueErrors are thrown when validation errors occur.
 ...     print e.message
 ... 
 Length of value 'simplejson' for field '_data' must be more than or equal to 15.000000
+>>> try:
+...     jsonschema.validate({"name":"simplejson"}, {"properties":{"name":{"minLength":15}}})
+... except jsonschema.ValidationError, e:
+...     print e.keyword, e.path, e.value, e.limit
+... 
+minLength ['_data', 'name'] simplejson 15
+
+Checking if a JSON document is valid without handling errors
+
+>>> import jsonschema
+>>> jsonschema.is_valid("simplejson", {"type":"string","minLength":15})
+False
 
 Running from the command line
 
@@ -63,6 +77,17 @@ Running from the command line
 % echo '"mystring"' > data.json
 % python -mjsonschema schema.json data.json
 
+Newline delimited json documents are validated one line at a time with the
+--lines option. Each invalid line is reported with its line number.
+
+% printf '"mystring"\\n1\\n' | python -mjsonschema --lines schema.json
+line 2: Value 1 for field '_data' is not of type 'string'
+
+Large files can be validated by several worker processes with the --jobs
+option.
+
+% python -mjsonschema --lines --jobs 8 schema.json data.ndjson
+
 '''
 
 #TODO: Line numbers for error messages
@@ -71,15 +96,103 @@ Running from the command line
 #      encoding using the "python -m<modulename>" format.
 #TODO: Support encodings other than utf-8
 
+import copy
+
 from jsonschema.validator import JSONSchemaValidator
+from jsonschema.errors import ValidationError, SchemaError
+from jsonschema import metaschema
+from jsonschema.compiler import SchemaCompiler, CompiledSchema
+from jsonschema.codegen import CodeGenerator
+from jsonschema.iterative import StackCompiler
+from jsonschema.canonical import canonical
+from jsonschema.cache import compiled_schemas, schema_objects
 
-__all__ = [ 'validate', 'JSONSchemaValidator' ]
+__all__ = [ 'validate', 'is_valid', 'validate_many', 'compile', 'check_schema',
+            'JSONSchemaValidator', 'CompiledSchema', 'ValidationError',
+            'SchemaError' ]
 __version__ = '0.1a'
 
+# Schema compilers by backend name
+_backends = {
+  "tree": SchemaCompiler,
+  "codegen": CodeGenerator,
+  "stack": StackCompiler
+}
+
+def compile(schema, validator_cls=None, interactive_mode=True, backend="tree",
+            shape_cache=0):
+  '''
+  Compiles the provided schema into a CompiledSchema object that can be
+  used to validate any number of json documents without processing the
+  schema again.
+  
+  >>> import jsonschema
+  >>> compiled = jsonschema.compile({"type":"string","minLength":5})
+  >>> compiled.validate("simplejson")
+  
+  ``schema``, ``validator_cls`` and ``interactive_mode`` have the same
+  meaning as for ``validate``. Validator methods that are overridden by
+  ``validator_cls`` are called for each document as usual.
+  
+  ``backend`` selects how the schema is compiled. "tree" compiles the
+  schema into a tree of checks and "codegen" generates and compiles
+  python source code specialized for the schema. "stack" validates the
+  deeply nested parts of documents without recursion, so that documents
+  nested deeper than the python recursion limit can be validated, see
+  ``jsonschema.iterative``.
+  
+  The schema is checked against the meta-schema first and a SchemaError
+  listing all of its errors is raised if it is not valid.
+  
+  If ``shape_cache`` is given, each object schema with properties keeps a
+  cache of up to that many key sets of the objects it has validated. The
+  checks of required fields, absent fields, default values and additional
+  properties are then planned once for each set of keys, which pays off
+  when the documents are objects of the same few shapes. Only the "tree"
+  backend supports it and ``CompiledSchema.shape_stats`` reports how well
+  the caches do.
+  
+  >>> compiled = jsonschema.compile({"properties":{"a":{"type":"integer", "optional":True}}},
+  ...                               shape_cache=16)
+  >>> for x in [{"a":1}, {"a":2}, {}]:
+  ...     compiled.validate(x)
+  >>> stats = compiled.shape_stats()
+  >>> stats["hits"], stats["misses"], stats["size"]
+  (1, 2, 2)
+  '''
+  if validator_cls == None:
+    validator_cls = JSONSchemaValidator
+  if backend not in _backends:
+    raise ValueError("Compiler backend '%s' is not supported" % backend)
+  if shape_cache:
+    if backend != "tree":
+      raise ValueError("Compiler backend '%s' does not support shape caches" % backend)
+    return SchemaCompiler(validator_cls(interactive_mode), shape_cache).compile(schema)
+  return _backends[backend](validator_cls(interactive_mode)).compile(schema)
+
+def check_schema(schema, validator_cls=None):
+  '''
+  Checks the provided schema against the meta-schema of the second draft
+  and raises a SchemaError listing all of the errors found in it.
+  
+  >>> import jsonschema
+  >>> jsonschema.check_schema({"title":1, "properties":{"a":{"maxLength":"1"}}})
+  Traceback (most recent call last):
+      ...
+  SchemaError: Schema is invalid: $: Value 1 for field 'title' is not of type 'string'; $.properties.a: Value '1' for field 'maxLength' is not of type 'integer'
+  
+  Schemas are checked when they are compiled, so this is only needed to
+  check a schema before it is used. Schema properties whose validator
+  methods are overridden by ``validator_cls`` are not checked.
+  '''
+  if validator_cls == None:
+    validator_cls = JSONSchemaValidator
+  metaschema.check_schema(schema, validator_cls())
+
 def validate(data, schema, validator_cls=None, interactive_mode=True):
   '''
   Validates a parsed json document against the provided schema. If an
-  error is found a ValueError is raised.
+  error is found a ValidationError is raised.
   
   ``data`` is a python dictionary object of parsed json data.
   
@@ -94,29 +207,158 @@ def validate(data, schema, validator_cls=None, interactive_mode=True):
   allow the validator to make changes to the given json ``data`` object
   to put in place default values specified in the given ``schema``
   object.
+  
+  Schemas are compiled on first use and kept in the process wide
+  ``jsonschema.cache.compiled_schemas`` cache, so validating many
+  documents against equal schemas only compiles the schema once. A
+  schema object that is changed in place is compiled again, see
+  ``jsonschema.cache``. A SchemaError is raised if the schema is not
+  valid, see ``check_schema``.
   '''
   if validator_cls == None:
     validator_cls = JSONSchemaValidator
-  v = validator_cls(interactive_mode)
-  return v.validate(data,schema)
+  return _prepare(schema, validator_cls, interactive_mode).validate(data)
 
-if __name__ == '__main__':
+def is_valid(data, schema, validator_cls=None, interactive_mode=True):
+  '''
+  Returns True if the parsed json document is valid against the provided
+  schema and False otherwise. Unlike ``validate`` no exceptions or error
+  messages are built for invalid documents, which makes rejecting
+  documents much cheaper when the reason is not needed.
+  
+  ``schema``, ``validator_cls`` and ``interactive_mode`` have the same
+  meaning as for ``validate``. Default values are added to valid
+  documents in interactive mode and may have been added to invalid ones.
+  '''
+  if validator_cls == None:
+    validator_cls = JSONSchemaValidator
+  return _prepare(schema, validator_cls, interactive_mode).is_valid(data)
+
+def validate_many(documents, schema, validator_cls=None, interactive_mode=True,
+                  processes=None, columnar=False):
+  '''
+  Validates each parsed json document of the iterable ``documents``
+  against the provided schema. The schema is compiled once for all of the
+  documents and documents are validated as they are taken from the
+  iterable, so generators can be used to validate large inputs.
+  
+  Yields an ``(index, ok, error)`` tuple for each document, where
+  ``index`` is the position of the document, ``ok`` is True if the
+  document is valid and ``error`` is the ValueError raised for an invalid
+  document. Invalid documents do not stop the validation.
+  
+  >>> import jsonschema
+  >>> for index, ok, error in jsonschema.validate_many(["a", 1, "b"], {"type":"string"}):
+  ...     if not ok:
+  ...         print index, error
+  ... 
+  1 Value 1 for field '_data' is not of type 'string'
+  
+  ``schema``, ``validator_cls`` and ``interactive_mode`` have the same
+  meaning as for ``validate``.
+  
+  If ``processes`` is given the documents are validated by a pool of that
+  many worker processes, each with its own compiled copy of the schema.
+  The documents are copied to the workers, so default values are not added
+  to them. See ``jsonschema.parallel``.
+  
+  If ``columnar`` is True and the schema is an object schema of flat
+  records, the documents are validated in batches column by column, which
+  is much faster for many small objects. See ``jsonschema.columnar``.
+  '''
+  if validator_cls == None:
+    validator_cls = JSONSchemaValidator
+  if processes is not None:
+    from jsonschema import parallel
+    return parallel.validate_many(documents, schema, validator_cls,
+                                  interactive_mode, processes,
+                                  columnar=columnar)
+  compiled = _prepare(schema, validator_cls, interactive_mode)
+  return compiled.validate_many(documents, columnar)
+
+def _prepare(schema, validator_cls, interactive_mode, backend="stack"):
+  '''
+  Returns the compiled schema for the given arguments from the caches of
+  compiled schemas, compiling and caching it if needed. The "stack"
+  backend compiles schemas that are not deeply nested like the "tree"
+  backend and validates deeply nested documents without recursion.
+  '''
+  objectkey = (validator_cls, bool(interactive_mode), backend, id(schema))
+  entry = schema_objects.get(objectkey)
+  if entry is not None and entry[0] is schema:
+    # The schema object may have been changed in place since it was
+    # compiled, so it is compared with the copy taken back then.
+    try:
+      if entry[1] == schema:
+        return entry[2]
+    except RuntimeError:
+      pass
+  
+  try:
+    key = (validator_cls, bool(interactive_mode), backend, canonical(schema))
+  except TypeError:
+    # The schema holds objects that can't be hashed so it can't be cached
+    # by content.
+    return compile(schema, validator_cls, interactive_mode, backend)
+  compiled = compiled_schemas.get(key)
+  if compiled is None:
+    compiled = compile(schema, validator_cls, interactive_mode, backend)
+    compiled_schemas.put(key, compiled)
+  try:
+    snapshot = copy.deepcopy(schema)
+  except (RuntimeError, TypeError, copy.Error):
+    # Schemas nested too deeply to be copied are only looked up by content.
+    pass
+  else:
+    # The entry keeps the schema object alive, so its id is not reused.
+    schema_objects.put(objectkey, (schema, snapshot, compiled))
+  return compiled
+
+def main(argv=None):
+  '''
+  Validates json documents from the command line. See the module
+  documentation for usage.
+  '''
   import sys, simplejson
-  if len(sys.argv) == 1:
-    raise SystemExit("%s SCHEMAFILE [INFILE]" % (sys.argv[0],))
-  elif len(sys.argv) == 2:
-    if sys.argv[1] == "--help":
-      raise SystemExit("%s SCHEMAFILE [INFILE]" % (sys.argv[0],))
-    schemafile = open(sys.argv[1], 'rb')
+  from optparse import OptionParser
+  parser = OptionParser(usage="%prog [options] SCHEMAFILE [INFILE]")
+  parser.add_option("-l", "--lines", action="store_true", default=False,
+                    help="validate newline delimited json documents, one per line")
+  parser.add_option("-j", "--jobs", type="int", default=1, metavar="N",
+                    help="validate lines with N worker processes (requires --lines and INFILE)")
+  options, args = parser.parse_args(argv)
+  if options.jobs > 1 and not (options.lines and len(args) == 2):
+    parser.error("--jobs requires --lines and INFILE")
+  if len(args) == 1:
+    schemafile = open(args[0], 'rb')
     infile = sys.stdin
-  elif len(sys.argv) == 3:
-    schemafile = open(sys.argv[1], 'rb')
-    infile = open(sys.argv[2], 'rb')
+  elif len(args) == 2:
+    schemafile = open(args[0], 'rb')
+    infile = open(args[1], 'rb')
   else:
-    raise SystemExit("%s SCHEMAFILE [INFILE]" % (sys.argv[0],))
+    parser.error("incorrect number of arguments")
   try:
-    obj = simplejson.load(infile)
     schema = simplejson.load(schemafile)
-    validate(obj, schema)
+    if options.lines:
+      if options.jobs > 1:
+        from jsonschema.parallel import validate_file
+        infile.close()
+        failures = validate_file(args[1], schema, processes=options.jobs)
+      else:
+        from jsonschema.stream import validate_lines
+        compiled = _prepare(schema, JSONSchemaValidator, True)
+        failures = ((lineno, error) for lineno, ok, error in validate_lines(infile, compiled) if not ok)
+      failed = False
+      for lineno, error in failures:
+        failed = True
+        sys.stderr.write("line %d: %s\n" % (lineno, error))
+      if failed:
+        raise SystemExit(1)
+    else:
+      obj = simplejson.load(infile)
+      validate(obj, schema)
   except ValueError, e:
-    raise SystemExit(e)
\ No newline at end of file
+    raise SystemExit(e)
+
+if __name__ == '__main__':
+  main()
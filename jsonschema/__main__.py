@@ -0,0 +1,10 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+# Allows running the validator with "python -m jsonschema".
+
+from jsonschema import main
+
+main()
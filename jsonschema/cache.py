@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Caches of prepared schema objects.
+
+Compiled schemas are stored in a process wide, size bounded cache so that
+validating many documents against the same schema only compiles it once.
+Schemas are looked up by their content rather than by identity: two
+schema objects that are equal json documents share a cache entry.
+
+Looking a schema up by its content walks the whole schema, so the schema
+objects used last are also kept in a small cache by identity together
+with a copy of their content. Using the same schema object again only
+compares it with the copy, which is much cheaper than building its
+content key, and a schema object that has been changed in place is
+looked up by its content again. The comparison follows python equality,
+so replacing a value by an equal value of another type, such as 1 by
+1.0, is not noticed until the schema object leaves ``schema_objects``.
+
+Regular expressions given by the "pattern" schema property are compiled
+once and shared by all schemas and validators through another cache.
+The caches can be resized with their resize method.
+'''
+
+import re, threading
+
+class LRUCache:
+  '''
+  A size bounded mapping that discards the least recently used entries
+  when it is full. The cache keeps count of hits, misses and evictions
+  and is safe to use from multiple threads.
+  '''
+  
+  def __init__(self, maxsize=128):
+    self._lock = threading.Lock()
+    self._maxsize = maxsize
+    self._map = {}
+    # Entries are kept in a circular doubly linked list of
+    # [prev, next, key, value] lists ordered from the least recently used
+    # entry to the most recently used one.
+    self._root = []
+    self._root[:] = [self._root, self._root, None, None]
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+  
+  def __len__(self):
+    return len(self._map)
+  
+  def __contains__(self, key):
+    return key in self._map
+  
+  def get(self, key, default=None):
+    '''
+    Returns the value stored for the given key and marks it as the most
+    recently used entry. Returns ``default`` if the key is not cached.
+    '''
+    self._lock.acquire()
+    try:
+      link = self._map.get(key)
+      if link is None:
+        self.misses += 1
+        return default
+      self.hits += 1
+      self._unlink(link)
+      self._append(link)
+      return link[3]
+    finally:
+      self._lock.release()
+  
+  def put(self, key, value):
+    '''
+    Stores a value for the given key, evicting the least recently used
+    entry if the cache is full.
+    '''
+    self._lock.acquire()
+    try:
+      link = self._map.get(key)
+      if link is not None:
+        link[3] = value
+        self._unlink(link)
+        self._append(link)
+        return
+      if self._maxsize <= 0:
+        return
+      while len(self._map) >= self._maxsize:
+        self._evict()
+      link = [None, None, key, value]
+      self._map[key] = link
+      self._append(link)
+    finally:
+      self._lock.release()
+  
+  def resize(self, maxsize):
+    '''
+    Changes the maximum number of entries, evicting entries if needed. A
+    size of 0 disables the cache.
+    '''
+    self._lock.acquire()
+    try:
+      self._maxsize = maxsize
+      while self._map and len(self._map) > maxsize:
+        self._evict()
+    finally:
+      self._lock.release()
+  
+  def clear(self):
+    '''
+    Removes all entries and resets the statistics.
+    '''
+    self._lock.acquire()
+    try:
+      self._map.clear()
+      self._root[:] = [self._root, self._root, None, None]
+      self.hits = self.misses = self.evictions = 0
+    finally:
+      self._lock.release()
+  
+  def stats(self):
+    '''
+    Returns a dictionary with the hit, miss and eviction counts and the
+    current and maximum size of the cache.
+    '''
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "evictions": self.evictions,
+      "size": len(self._map),
+      "maxsize": self._maxsize
+    }
+  
+  def _append(self, link):
+    root = self._root
+    last = root[0]
+    link[0] = last
+    link[1] = root
+    last[1] = root[0] = link
+  
+  def _unlink(self, link):
+    prev, next = link[0], link[1]
+    prev[1] = next
+    next[0] = prev
+  
+  def _evict(self):
+    oldest = self._root[1]
+    self._unlink(oldest)
+    del self._map[oldest[2]]
+    self.evictions += 1
+
+def compile_pattern(pattern):
+  '''
+  Returns the compiled regular expression for the given pattern from the
+  cache of compiled patterns, compiling and caching it if needed.
+  '''
+  regex = compiled_patterns.get(pattern)
+  if regex is None:
+    regex = re.compile(pattern)
+    compiled_patterns.put(pattern, regex)
+  return regex
+
+# Compiled schemas by validator class, interactive mode, compiler backend
+# and schema content.
+compiled_schemas = LRUCache(256)
+
+# (schema, copy of the schema, compiled schema) tuples by validator class,
+# interactive mode, compiler backend and the id of the schema object, so
+# that a schema object used again is only compared with its copy.
+schema_objects = LRUCache(64)
+
+# Compiled regular expressions by pattern.
+compiled_patterns = LRUCache(512)
+
+__all__ = [ 'LRUCache', 'compile_pattern', 'compiled_schemas',
+            'schema_objects', 'compiled_patterns' ]
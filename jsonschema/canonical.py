@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Hashable representations of json values.
+
+json objects and arrays are parsed into python dictionaries and lists,
+which can't be hashed. The functions in this module turn json values into
+hashable objects so that they can be used as dictionary keys and set
+members.
+
+There are two kinds of representations. ``canonical`` distinguishes
+values of different types and is used to look up schemas, where 1, 1.0
+and True mean different things. ``equality_key`` follows python equality,
+which is what the validators use to compare values.
+
+``first_duplicate`` finds the first pair of equal items of a json array
+by looking up the ``item_key`` of its items in a dictionary, so arrays
+are checked for duplicates in a single pass over their items. Item keys
+are equality keys that keep booleans apart from numbers, as true and 1
+are different json values.
+'''
+
+import types
+
+def canonical(value):
+  '''
+  Returns a hashable representation of a json value that is equal for
+  equal json values. Object members are compared regardless of their
+  order and values of different types are never equal, so the integer 1,
+  the float 1.0 and True all have different representations.
+  
+  The representation is a flat tuple rather than nested tuples, so that
+  deeply nested values can be hashed and compared without recursion:
+  each value is written as its type followed by the value itself, or by
+  the number of members or items of objects and arrays, which are then
+  written in order. Object members are written sorted by name.
+  
+  Raises TypeError if the value contains unhashable objects that are not
+  json objects or arrays.
+  '''
+  tokens = []
+  # (name, value) tuples of the values to write, where ``name`` is True
+  # for object member names.
+  stack = [(False, value)]
+  while stack:
+    name, value = stack.pop()
+    valuetype = type(value)
+    if name or valuetype not in _containertypes:
+      hash(value)
+      tokens.append(valuetype)
+      tokens.append(value)
+    elif valuetype == types.DictType:
+      tokens.append(valuetype)
+      tokens.append(len(value))
+      for k in sorted(value, key=_member_order, reverse=True):
+        stack.append((False, value[k]))
+        stack.append((True, k))
+    else:
+      tokens.append(valuetype)
+      tokens.append(len(value))
+      stack.extend([(False, v) for v in reversed(value)])
+  return tuple(tokens)
+
+_containertypes = frozenset([types.DictType, types.ListType])
+
+def _member_order(name):
+  return (type(name), name)
+
+# Types of values that are their own equality key.
+_scalartypes = (types.StringType, types.UnicodeType, types.IntType,
+                types.LongType, types.FloatType, types.BooleanType,
+                types.NoneType)
+_scalarset = frozenset(_scalartypes)
+
+# Markers for json objects and arrays in the representations returned by
+# equality_key. Nothing else compares equal to them.
+_OBJECT = object()
+_ARRAY = object()
+
+def equality_key(value):
+  '''
+  Returns a hashable representation of a json value. Two json values have
+  equal representations if and only if they compare equal in python:
+  
+  - Numbers are compared by value, so 1, 1L and 1.0 are equal. Booleans
+    are numbers too, so True is equal to 1 and 1.0 and False is equal to 0
+    and 0.0.
+  - Strings are equal to unicode strings with the same characters.
+  - Arrays are equal if they have the same length and their items are
+    equal in order. Objects are equal if they have equal member names with
+    equal values. Arrays and objects are never equal to other values.
+  
+  Raises TypeError if the value contains unhashable objects that are not
+  json objects or arrays.
+  '''
+  valuetype = type(value)
+  if valuetype in _scalarset:
+    return value
+  elif valuetype == types.DictType:
+    # Strings and numbers are their own keys and are not passed to
+    # equality_key again.
+    return (_OBJECT, frozenset([(type(k) in _scalarset and k or equality_key(k),
+                                 type(v) in _scalarset and v or equality_key(v))
+                                for k, v in value.iteritems()]))
+  elif valuetype == types.ListType:
+    return (_ARRAY, tuple([type(v) in _scalarset and v or equality_key(v)
+                           for v in value]))
+  hash(value)
+  return value
+
+# Types of values that are their own item key.
+_plainset = _scalarset - frozenset([types.BooleanType])
+
+# Marks booleans in the representations returned by item_key.
+_BOOLEAN = object()
+
+def item_key(value):
+  '''
+  Returns a hashable representation of a json value like equality_key,
+  except that booleans are only equal to booleans, so true and 1 are
+  different while 1 and 1.0 are still equal.
+  
+  Raises TypeError if the value contains unhashable objects that are not
+  json objects or arrays.
+  '''
+  valuetype = type(value)
+  if valuetype in _plainset:
+    return value
+  elif valuetype is types.BooleanType:
+    return (_BOOLEAN, value)
+  elif valuetype == types.DictType:
+    return (_OBJECT, frozenset([(type(k) in _plainset and k or item_key(k),
+                                 type(v) in _plainset and v or item_key(v))
+                                for k, v in value.iteritems()]))
+  elif valuetype == types.ListType:
+    return (_ARRAY, tuple([type(v) in _plainset and v or item_key(v)
+                           for v in value]))
+  hash(value)
+  return value
+
+class ValueSet:
+  '''
+  An immutable set of json values. Testing if a value is a member of the
+  set takes constant time and gives the same result as testing if the
+  value is in a list of the same values, following the rules of
+  ``equality_key``.
+  '''
+  
+  # Types of values that are their own equality key.
+  _scalartypes = _scalartypes
+  
+  def __init__(self, values):
+    self.values = values
+    keys = []
+    self._unhashable = []
+    for value in values:
+      try:
+        keys.append(equality_key(value))
+      except TypeError:
+        self._unhashable.append(value)
+    self._keys = frozenset(keys)
+  
+  def __len__(self):
+    return len(self.values)
+  
+  def __contains__(self, value):
+    if type(value) in self._scalartypes:
+      key = value
+    else:
+      try:
+        key = equality_key(value)
+      except TypeError:
+        return value in self.values
+    if key in self._keys:
+      return True
+    return bool(self._unhashable) and value in self._unhashable
+
+# Stands in for the equality keys of items that can't be hashed.
+_UNHASHABLE = object()
+
+def first_duplicate(values):
+  '''
+  Returns the (index, index) tuple of the indexes of the first pair of
+  equal items of the list ``values``, following the rules of
+  ``item_key``, or None if all of its items are different. The pair
+  is the one whose second item comes first.
+  
+  >>> from jsonschema.canonical import first_duplicate
+  >>> first_duplicate([{"a":1, "b":[2]}, 3, {"b":[2.0], "a":1.0}, 3])
+  (0, 2)
+  >>> first_duplicate([[1, 2], [2, 1], "1", True]) is None
+  True
+  '''
+  unhashable = False
+  if frozenset(map(type, values)) <= _plainset:
+    keys = values
+  else:
+    keys = []
+    for value in values:
+      try:
+        keys.append(item_key(value))
+      except TypeError:
+        # Items that can't be hashed are compared with all of the others.
+        keys.append(_UNHASHABLE)
+        unhashable = True
+  if not unhashable and len(frozenset(keys)) == len(keys):
+    return None
+  
+  seen = {}
+  others = []
+  for index, key in enumerate(keys):
+    if key is _UNHASHABLE:
+      for earlier in range(index):
+        if values[earlier] == values[index]:
+          return (earlier, index)
+      others.append(index)
+      continue
+    earlier = seen.setdefault(key, index)
+    if earlier != index:
+      return (earlier, index)
+    for earlier in others:
+      if values[earlier] == values[index]:
+        return (earlier, index)
+  return None
+
+__all__ = [ 'canonical', 'equality_key', 'item_key', 'ValueSet',
+            'first_duplicate' ]
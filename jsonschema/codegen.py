@@ -0,0 +1,541 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Compiles a json-schema into generated python source code.
+
+The CodeGenerator produces the source of a single function that validates
+a document against the schema. Type checks, property lookups, range
+checks, enumerations and the processing of nested properties and items are
+written out as straight-line code for the given schema, so validating a
+document does not call a validator method per schema property.
+
+Schema properties that the generator does not write out, and validator
+methods that have been overridden by a subclass, are handled by calling
+the checks built by the SchemaCompiler from the generated code. The
+generated function raises the same errors as JSONSchemaValidator.
+
+A second function that returns False instead of raising an error is
+generated from the same schema and attached as the ``test`` attribute of
+the validation function.
+
+Python limits how deeply blocks and loops can be nested in a function,
+so sub schemas nested more than ``maxdepth`` levels below the schema of a
+function are generated as functions of their own, which the generated
+code calls.
+'''
+
+import math, re, types
+
+from jsonschema import decimals, metaschema, vectorized
+from jsonschema.cache import compile_pattern
+from jsonschema.canonical import ValueSet, first_duplicate
+from jsonschema.compiler import SchemaCompiler, CompiledSchema
+from jsonschema.errors import ValidationError
+
+class CodeGenerator(SchemaCompiler):
+  '''
+  Compiles json-schema objects into generated python functions. The
+  generated function takes the arguments (x, fieldname) like the nodes
+  built by the SchemaCompiler and its source is available as the
+  ``source`` attribute of the function. Like the nodes it has a boolean
+  ``test`` function.
+  '''
+  
+  # Types of values that are written into the source as literals.
+  _literaltypes = (types.StringType, types.UnicodeType, types.IntType,
+                   types.LongType, types.BooleanType, types.NoneType)
+  
+  _stringtypes = (types.StringType, types.UnicodeType)
+  
+  # Sub schemas nested deeper than this are generated as functions of
+  # their own. Each level of sub schemas opens at most two loops and try
+  # blocks and four levels of indentation, and python allows 20 nested
+  # blocks and 100 levels of indentation.
+  maxdepth = 8
+  
+  # The functions generated for sub schemas by the id of the schema.
+  _functions = None
+  
+  def compile(self, schema):
+    '''
+    Compiles the given json-schema and returns a CompiledSchema object.
+    Raises a SchemaError if the schema is not valid against the
+    meta-schema.
+    '''
+    metaschema.check_schema(schema, self.validator)
+    root = self.generate(schema)
+    return CompiledSchema(self.validator, schema, root, (), self.discriminators)
+  
+  def generate(self, schema):
+    '''
+    Generates and compiles the validation function for the given schema.
+    '''
+    function = self._generate(schema, "validate", False)
+    function.test = self._generate(schema, "test", True)
+    return function
+  
+  def _generate(self, schema, functionname, boolean):
+    '''
+    Generates a function with the given name. If ``boolean`` is True the
+    function returns True or False instead of raising errors.
+    '''
+    self._lines = []
+    self._indent = 1
+    self._depth = 0
+    self._namespace = {"ValidationError": ValidationError}
+    self._counter = 0
+    self._boolean = boolean
+    
+    value = self.name("v")
+    self.line("%s = x.get(fieldname)" % value)
+    self.emit_node(schema, "x", "fieldname", value)
+    if boolean:
+      self.line("return True")
+    
+    source = "def %s(x, fieldname):\n" % functionname + "\n".join(self._lines) + "\n"
+    code = compile(source, "<jsonschema>", "exec")
+    namespace = self._namespace
+    exec code in namespace
+    function = namespace[functionname]
+    function.source = source
+    return function
+  
+  #{{{ Source code helpers
+  def name(self, prefix):
+    '''
+    Returns a new unique variable name.
+    '''
+    self._counter += 1
+    return "%s%d" % (prefix, self._counter)
+  
+  def const(self, value):
+    '''
+    Returns a source expression for the given constant value.
+    '''
+    if type(value) in self._literaltypes:
+      return repr(value)
+    name = self.name("_c")
+    self._namespace[name] = value
+    return name
+  
+  def line(self, source):
+    self._lines.append("  " * self._indent + source)
+  
+  def block(self, source):
+    '''
+    Starts a new block with the given statement. Blocks are closed with
+    the end method.
+    '''
+    self.line(source)
+    self._indent += 1
+    return len(self._lines)
+  
+  def end(self, start):
+    if len(self._lines) == start:
+      self.line("pass")
+    self._indent -= 1
+  
+  def error(self, message, args, keyword=None, fieldname="None",
+            value="None", limit="None", cause="None"):
+    '''
+    Writes out raising a ValidationError for the given schema property
+    with the given message and arguments, or returning False from a
+    boolean function. The arguments are source expressions. Without a
+    schema property a ValueError is raised with the formatted message.
+    '''
+    if self._boolean:
+      self.line("return False")
+    elif keyword is not None:
+      self.line("raise ValidationError(%s, (%s,), %s, %s, %s, %s, %s)" % (
+        self.const(message), ", ".join(args), repr(keyword), fieldname,
+        value, limit, cause))
+    elif args:
+      self.line("raise ValueError(%s %% (%s,))" % (self.const(message), ", ".join(args)))
+    else:
+      self.line("raise ValueError(%s)" % self.const(message))
+  #}}}
+  
+  def emit_node(self, schema, x, fieldname, value):
+    '''
+    Writes out the checks for a schema object. ``x`` and ``fieldname``
+    are the source expressions of the container and the field name and
+    ``value`` is the variable holding the value of the field.
+    '''
+    if schema is None:
+      return
+    if not type(schema) == types.DictType:
+      self.error("Schema structure is invalid.", [])
+      return
+    if self._depth >= self.maxdepth:
+      self._emit_function(schema, x, fieldname, value)
+      return
+    
+    self._depth += 1
+    for schemaprop in self.validator._schema_keywords(schema):
+      emit = getattr(self, "emit_"+schemaprop, None)
+      if emit is None or self.validator._is_overridden(schemaprop) or \
+         not emit(schema, schema.get(schemaprop), x, fieldname, value):
+        self.emit_check(schema, schemaprop, x, fieldname, value)
+    self._depth -= 1
+  
+  def emit_check(self, schema, schemaprop, x, fieldname, value):
+    '''
+    Writes out a call to the check built by the SchemaCompiler for the
+    given schema property.
+    '''
+    check = self.compile_keyword(schema, schemaprop)
+    if check is not None:
+      if self._boolean:
+        start = self.block("if not %s(%s, %s):" % (self.const(check.test), x, fieldname))
+        self.line("return False")
+        self.end(start)
+      else:
+        self.line("%s(%s, %s)" % (self.const(check), x, fieldname))
+      self.line("%s = %s.get(%s)" % (value, x, fieldname))
+  
+  def _emit_function(self, schema, x, fieldname, value):
+    '''
+    Writes out a call to the functions generated for the given schema
+    object by a new CodeGenerator.
+    '''
+    # The functions are generated once for both the validation and the
+    # boolean function, and shared with the new CodeGenerator.
+    functions = self._functions
+    if functions is None:
+      functions = self._functions = {}
+    function = functions.get(id(schema))
+    if function is None:
+      generator = self.__class__(self.validator)
+      generator.discriminators = self.discriminators
+      generator._functions = functions
+      function = functions[id(schema)] = generator.generate(schema)
+    if self._boolean:
+      start = self.block("if not %s(%s, %s):" % (self.const(function.test), x, fieldname))
+      self.line("return False")
+      self.end(start)
+    else:
+      self.line("%s(%s, %s)" % (self.const(function), x, fieldname))
+    self.line("%s = %s.get(%s)" % (value, x, fieldname))
+  
+  # The emit_<property> methods write out the checks for a schema property.
+  # They return False if the property should be handled by the check built
+  # by the SchemaCompiler instead.
+  
+  def emit_noop(self, schema, arg, x, fieldname, value):
+    return True
+  
+  emit_options = emit_readonly = emit_noop
+  emit_format = emit_transient = emit_hidden = emit_noop
+  emit_extends = emit_noop
+  
+  def emit_type(self, schema, fieldtype, x, fieldname, value):
+    try:
+      converted_fieldtype = self.validator._convert_type(fieldtype)
+    except ValueError:
+      return False
+    
+    typelist = self._flatten_types(converted_fieldtype)
+    if typelist is None:
+      return False
+    if None in typelist:
+      # "any" matches everything
+      return True
+    
+    start = self.block("if %s in %s and type(%s) not in %s:" % (fieldname, x, value, self.const(tuple(typelist))))
+    fieldtype = self.const(fieldtype)
+    self.error("Value %r for field '%s' is not of type %r", [value, fieldname, fieldtype],
+               "type", fieldname, value, fieldtype)
+    self.end(start)
+    return True
+  
+  def emit_optional(self, schema, optional, x, fieldname, value):
+    if not optional:
+      start = self.block("if %s not in %s:" % (fieldname, x))
+      self.error("Required field '%s' is missing", [fieldname], "optional", fieldname)
+      self.end(start)
+    return True
+  
+  def emit_properties(self, schema, properties, x, fieldname, value):
+    if not type(properties) == types.DictType:
+      return False
+    
+    start = self.block("if type(%s) is dict:" % value)
+    body = self.path_block()
+    for eachProp in properties.keys():
+      propname = self.const(eachProp)
+      propvalue = self.name("v")
+      self.line("%s = %s.get(%s)" % (propvalue, value, propname))
+      mark = len(self._lines)
+      self.emit_node(properties.get(eachProp), value, propname, propvalue)
+      if len(self._lines) == mark:
+        # Nothing to check for the field.
+        self._lines.pop()
+    self.end_path_block(body, fieldname)
+    self.end(start)
+    return True
+  
+  def path_block(self):
+    '''
+    Starts a block that adds the field name to the path of the errors
+    raised for the fields of an object. Blocks are closed with the
+    end_path_block method.
+    '''
+    if self._boolean:
+      return None
+    return self.block("try:")
+  
+  def end_path_block(self, start, fieldname):
+    if start is None:
+      return
+    self.end(start)
+    error = self.name("e")
+    handler = self.block("except ValidationError, %s:" % error)
+    self.line("%s.path.insert(0, %s)" % (error, fieldname))
+    self.line("raise")
+    self.end(handler)
+  
+  def emit_items(self, schema, items, x, fieldname, value):
+    if not type(items) == types.DictType:
+      return False
+    
+    item = self.name("item")
+    wrapper = self.name("x")
+    itemvalue = self.name("v")
+    error = self.name("e")
+    start = self.block("if type(%s) is list:" % value)
+    # A single container is reused for all of the items.
+    self.line("%s = {}" % wrapper)
+    # Long lists of numbers and strings only check the items that may fail.
+    select = vectorized.items_filter(self.validator, items)
+    if select is None:
+      loop = self.block("for %s in %s:" % (item, value))
+    else:
+      loop = self.block("for %s in %s(%s):" % (item, self.const(select), value))
+    self.line("%s['_data'] = %s" % (wrapper, item))
+    self.line("%s = %s" % (itemvalue, item))
+    if self._boolean:
+      self.emit_node(items, wrapper, "'_data'", itemvalue)
+    else:
+      body = self.block("try:")
+      self.emit_node(items, wrapper, "'_data'", itemvalue)
+      self.end(body)
+      handler = self.block("except ValueError, %s:" % error)
+      self.error("Failed to validate field '%s' list schema: %r", [fieldname, error],
+                 "items", fieldname, value, self.const(items), error)
+      self.end(handler)
+    self.end(loop)
+    self.end(start)
+    return True
+  
+  def emit_additionalProperties(self, schema, additionalProperties, x, fieldname, value):
+    if type(additionalProperties) == types.BooleanType:
+      if additionalProperties:
+        return True
+    elif not type(additionalProperties) == types.DictType:
+      return False
+    
+    properties = schema.get("properties")
+    if properties is None:
+      properties = {}
+    if type(properties) == types.DictType:
+      declared = frozenset(properties)
+    else:
+      declared = frozenset()
+    
+    keys = self.name("keys")
+    key = self.name("k")
+    keyvalue = self.name("v")
+    # Objects without additional properties are found by one set operation.
+    shape = self.block("if type(%s) is not dict or not %s.viewkeys() <= %s:" % (value, value, self.const(declared)))
+    start = self.block("try:")
+    self.line("%s = %s.keys()" % (keys, value))
+    self.end(start)
+    start = self.block("except AttributeError:")
+    self.error("Schema property 'additionalProperties' is not supported", [])
+    self.end(start)
+    loop = self.block("for %s in %s:" % (key, keys))
+    start = self.block("if %s not in %s:" % (key, self.const(properties)))
+    if additionalProperties is False:
+      self.error("Additional properties not defined by 'properties' are not allowed in field '%s'", [fieldname],
+                 "additionalProperties", fieldname, value, "False")
+    else:
+      self.line("%s = %s.get(%s)" % (keyvalue, value, key))
+      body = self.path_block()
+      self.emit_node(additionalProperties, value, key, keyvalue)
+      self.end_path_block(body, fieldname)
+    self.end(start)
+    self.end(loop)
+    self.end(shape)
+    return True
+  
+  def emit_requires(self, schema, requires, x, fieldname, value):
+    if requires is not None:
+      requires = self.const(requires)
+      start = self.block("if %s is not None and %s.get(%s) is None:" % (value, x, requires))
+      self.error("Field '%s' is required by field '%s'", [requires, fieldname],
+                 "requires", fieldname, value, requires)
+      self.end(start)
+    return True
+  
+  def emit_minimum(self, schema, minimum, x, fieldname, value):
+    if minimum is not None:
+      self._emit_range("minimum", value, fieldname, minimum, "<",
+        "Value %r for field '%s' is less than minimum value: %f",
+        "Value %r for field '%s' has fewer values than the minimum: %f")
+    return True
+  
+  def emit_maximum(self, schema, maximum, x, fieldname, value):
+    if maximum is not None:
+      self._emit_range("maximum", value, fieldname, maximum, ">",
+        "Value %r for field '%s' is greater than maximum value: %f",
+        "Value %r for field '%s' has more values than the maximum: %f")
+    return True
+  
+  def _emit_range(self, keyword, value, fieldname, limit, operator, message, listmessage):
+    limit = self.const(limit)
+    valuetype = self.name("t")
+    self.line("%s = type(%s)" % (valuetype, value))
+    start = self.block("if (%s is int or %s is float) and %s %s %s:" % (valuetype, valuetype, value, operator, limit))
+    self.error(message, [value, fieldname, limit], keyword, fieldname, value, limit)
+    self.end(start)
+    start = self.block("elif %s is list and len(%s) %s %s:" % (valuetype, value, operator, limit))
+    self.error(listmessage, [value, fieldname, limit], keyword, fieldname, value, limit)
+    self.end(start)
+  
+  def emit_minItems(self, schema, minitems, x, fieldname, value):
+    if minitems is not None:
+      minitems = self.const(minitems)
+      start = self.block("if type(%s) is list and len(%s) < %s:" % (value, value, minitems))
+      self.error("Value %r for field '%s' must have a minimum of %d items", [fieldname, fieldname, minitems],
+                 "minItems", fieldname, value, minitems)
+      self.end(start)
+    return True
+  
+  def emit_maxItems(self, schema, maxitems, x, fieldname, value):
+    if maxitems is not None:
+      maxitems = self.const(maxitems)
+      start = self.block("if type(%s) is list and len(%s) > %s:" % (value, value, maxitems))
+      self.error("Value %r for field '%s' must have a maximum of %d items", [value, fieldname, maxitems],
+                 "maxItems", fieldname, value, maxitems)
+      self.end(start)
+    return True
+  
+  def emit_identity(self, schema, unique, x, fieldname, value):
+    return self._emit_unique("identity", unique, value, fieldname)
+  
+  def emit_uniqueItems(self, schema, unique, x, fieldname, value):
+    return self._emit_unique("uniqueItems", unique, value, fieldname)
+  
+  def _emit_unique(self, schemaprop, unique, value, fieldname):
+    if unique:
+      duplicate = self.name("dup")
+      start = self.block("if type(%s) is list:" % value)
+      self.line("%s = %s(%s)" % (duplicate, self.const(first_duplicate), value))
+      found = self.block("if %s is not None:" % duplicate)
+      self.error("Value %r for field '%s' has equal items at indexes %d and %d",
+                 [value, fieldname, duplicate+"[0]", duplicate+"[1]"],
+                 schemaprop, fieldname, value, self.const(unique))
+      self.end(found)
+      self.end(start)
+    return True
+  
+  def emit_pattern(self, schema, pattern, x, fieldname, value):
+    if pattern is None:
+      return True
+    try:
+      regex = compile_pattern(pattern)
+    except (re.error, TypeError):
+      # Invalid patterns fail when a string is validated.
+      return False
+    start = self.block("if type(%s) in %s and not %s.match(%s):" % (value, self.const(self._stringtypes), self.const(regex), value))
+    pattern = self.const(pattern)
+    self.error("Value %r for field '%s' does not match regular expression '%s'", [value, fieldname, pattern],
+               "pattern", fieldname, value, pattern)
+    self.end(start)
+    return True
+  
+  def emit_maxLength(self, schema, length, x, fieldname, value):
+    if length is not None:
+      length = self.const(length)
+      start = self.block("if type(%s) in %s and len(%s) > %s:" % (value, self.const(self._stringtypes), value, length))
+      self.error("Length of value %r for field '%s' must be less than or equal to %f", [value, fieldname, length],
+                 "maxLength", fieldname, value, length)
+      self.end(start)
+    return True
+  
+  def emit_minLength(self, schema, length, x, fieldname, value):
+    if length is not None:
+      length = self.const(length)
+      start = self.block("if type(%s) in %s and len(%s) < %s:" % (value, self.const(self._stringtypes), value, length))
+      self.error("Length of value %r for field '%s' must be more than or equal to %f", [value, fieldname, length],
+                 "minLength", fieldname, value, length)
+      self.end(start)
+    return True
+  
+  def emit_enum(self, schema, options, x, fieldname, value):
+    if options is None:
+      return True
+    if not type(options) == types.ListType:
+      return False
+    start = self.block("if %s is not None and %s not in %s:" % (value, value, self.const(ValueSet(options))))
+    options = self.const(options)
+    self.error("Value %r for field '%s' is not in the enumeration: %r", [value, fieldname, options],
+               "enum", fieldname, value, options)
+    self.end(start)
+    return True
+  
+  def emit_title(self, schema, title, x, fieldname, value):
+    if title is not None and not self.validator._is_string_type(title):
+      self.error("The title for field '%s' must be a string", [fieldname])
+    return True
+  
+  def emit_description(self, schema, description, x, fieldname, value):
+    if description is not None and not self.validator._is_string_type(description):
+      self.error("The description for field '%s' must be a string.", [fieldname])
+    return True
+  
+  def emit_default(self, schema, default, x, fieldname, value):
+    if self.validator._interactive_mode and default is not None and \
+       not schema.get("readonly"):
+      start = self.block("if %s not in %s:" % (fieldname, x))
+      self.line("%s[%s] = %s" % (x, fieldname, self.const(default)))
+      self.line("%s = %s" % (value, self.const(default)))
+      self.end(start)
+    return True
+  
+  def emit_maxDecimal(self, schema, maxdecimal, x, fieldname, value):
+    if maxdecimal is not None:
+      fits = self.const(decimals.max_places(maxdecimal))
+      start = self.block("if %s is not None:" % value)
+      scale = decimals.float_scale(maxdecimal)
+      if scale is not None:
+        # Most valid floats pass the test of decimals.max_places inline.
+        scale = self.const(scale)
+        fast = self.block("if type(%s) is not float or %s(%s * %s + 0.5) / %s != %s:" %
+                          (value, self.const(math.floor), value, scale, scale, value))
+      if self._boolean:
+        # str() raises UnicodeEncodeError for non-ascii unicode values.
+        result = self.name("ok")
+        body = self.block("try:")
+        self.line("%s = %s(%s)" % (result, fits, value))
+        self.end(body)
+        handler = self.block("except UnicodeError:")
+        self.line("return False")
+        self.end(handler)
+        condition = "not %s" % result
+      else:
+        condition = "not %s(%s)" % (fits, value)
+      maxdecimal = self.const(maxdecimal)
+      check = self.block("if %s:" % condition)
+      self.error("Value %r for field '%s' must not have more than %d decimal places", [value, fieldname, maxdecimal],
+                 "maxDecimal", fieldname, value, maxdecimal)
+      self.end(check)
+      if scale is not None:
+        self.end(fast)
+      self.end(start)
+    return True
+
+__all__ = [ 'CodeGenerator' ]
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Column by column validation of batches of flat records.
+
+``CompiledSchema.validate_many(documents, columnar=True)`` takes the
+documents ``BATCH_SIZE`` at a time. The values of each property of the
+object schema are pulled out of all of the records of the batch into a
+column, and the checks of the property are run on the whole column with
+the builtin set, map, min and max functions, so that a column of valid
+values is checked without running python code for each value. The
+records that may be invalid are marked in a mask of the batch, and only
+those are validated one by one, which gives them the same errors as
+validating each document on its own.
+
+Columns are planned when a schema is compiled. Only object schemas with
+properties whose validation can't change the documents or the validator
+are planned, see SchemaCompiler._has_effects. Properties with schema
+properties other than "optional", "type", "minimum", "maximum",
+"maxDecimal", "minLength", "maxLength", "pattern" and "enum" are tested
+record by record, and documents of other schemas are always validated
+one by one.
+'''
+
+import re, types
+from operator import methodcaller
+
+from jsonschema import cache, decimals
+from jsonschema.canonical import ValueSet
+
+# The number of documents validated together.
+BATCH_SIZE = 1000
+
+# Marks the records that don't have a property in its column. Nothing else
+# is of the type object.
+_MISSING = object()
+
+_stringtypes = frozenset([types.StringType, types.UnicodeType])
+_numbertypes = frozenset([types.IntType, types.FloatType])
+
+# Schema properties of the root schema that can be checked on their own
+# or have no effect on records.
+_rootkeywords = frozenset(["type", "properties", "additionalProperties",
+                           "optional", "title", "description", "format",
+                           "readonly", "transient", "hidden"])
+
+# Schema properties with no effect on validation.
+_noops = frozenset(["title", "description", "format", "readonly",
+                    "transient", "hidden"])
+
+class Columns:
+  '''
+  The plan of the columns of an object schema. ``fields`` is the list of
+  (fieldname, node, checks) tuples of its properties, where ``checks`` is
+  the list of the column checks of the property, or None if the property
+  is tested record by record with its compiled node.
+  '''
+  
+  def __init__(self, fields, declared):
+    self.fields = fields
+    # The declared properties if records can't have others without
+    # being checked.
+    self.declared = declared
+  
+  def suspects(self, batch):
+    '''
+    Returns a bytearray mask of the records of the batch that may be
+    invalid.
+    '''
+    mask = bytearray(len(batch))
+    records = batch
+    if frozenset(map(type, batch)) != frozenset([types.DictType]):
+      records = []
+      for index, record in enumerate(batch):
+        if type(record) != types.DictType:
+          mask[index] = 1
+          record = {}
+        records.append(record)
+    if self.declared is not None:
+      declared = self.declared
+      for index, record in enumerate(records):
+        if not record.viewkeys() <= declared:
+          mask[index] = 1
+    
+    for eachProp, node, checks in self.fields:
+      if checks is not None:
+        column = map(methodcaller("get", eachProp, _MISSING), records)
+        kinds = frozenset(map(type, column))
+        for check in checks:
+          if not check(column, kinds):
+            break
+        else:
+          continue
+      # The records of columns that fail are tested one by one.
+      test = node.test
+      for index, record in enumerate(records):
+        if not test(record, eachProp):
+          mask[index] = 1
+    return mask
+  
+  def validate_many(self, compiled, documents):
+    '''
+    Validates the documents with the compiled schema in batches and
+    yields an (index, ok, error) tuple for each of them.
+    '''
+    compiled.validator._begin(compiled.schema)
+    root = compiled.root
+    x = {}
+    offset = 0
+    for batch in _batches(documents, BATCH_SIZE):
+      mask = self.suspects(batch)
+      for index, data in enumerate(batch):
+        if mask[index]:
+          x["_data"] = data
+          try:
+            root(x, "_data")
+          except ValueError, e:
+            yield (offset + index, False, e)
+            continue
+        yield (offset + index, True, None)
+      offset += len(batch)
+
+def _batches(documents, size):
+  batch = []
+  for data in documents:
+    batch.append(data)
+    if len(batch) == size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+def plan(compiler, schema, root):
+  '''
+  Returns the Columns of the given compiled schema, or None if its
+  documents are not validated column by column.
+  '''
+  validator = compiler.validator
+  if type(schema) != types.DictType or \
+     type(schema.get("properties")) != types.DictType or \
+     compiler._has_effects(schema):
+    return None
+  for schemaprop in validator._schema_keywords(schema):
+    if schemaprop not in _rootkeywords or validator._is_overridden(schemaprop):
+      return None
+  try:
+    fieldtype = validator._convert_type(schema.get("type"))
+  except ValueError:
+    return None
+  if fieldtype is not None and fieldtype is not types.DictType and \
+     not (type(fieldtype) == types.ListType and types.DictType in fieldtype):
+    return None
+  
+  properties = [check for check in root.checks if hasattr(check, "fields")]
+  if not properties:
+    return None
+  fields = []
+  for eachProp, node, present in properties[0].fields:
+    fields.append((eachProp, node, _column_checks(validator, node.schema)))
+  
+  declared = None
+  if schema.get("additionalProperties") not in (None, True):
+    declared = frozenset(schema["properties"])
+  return Columns(fields, declared)
+
+def _column_checks(validator, schema):
+  '''
+  Returns the list of column checks of a property schema, or None if the
+  property is not checked by column.
+  '''
+  if type(schema) != types.DictType:
+    return None
+  checks = []
+  for schemaprop in validator._schema_keywords(schema):
+    if schemaprop in _noops:
+      continue
+    value = schema.get(schemaprop)
+    if schemaprop == "optional":
+      if not value:
+        checks.append(_present)
+    elif schemaprop == "type":
+      try:
+        fieldtype = validator._convert_type(value)
+      except ValueError:
+        return None
+      if fieldtype is None:
+        continue
+      if not validator._is_python_type(fieldtype):
+        return None
+      if type(fieldtype) != types.ListType:
+        fieldtype = [fieldtype]
+      if None in fieldtype:
+        continue
+      checks.append(_type_check(frozenset(fieldtype)))
+    elif schemaprop in ("minimum", "maximum") and value is not None:
+      checks.append(_range_check(schemaprop == "minimum", value))
+    elif schemaprop in ("minLength", "maxLength") and value is not None:
+      checks.append(_length_check(schemaprop == "minLength", value))
+    elif schemaprop == "pattern" and value is not None:
+      try:
+        checks.append(_pattern_check(cache.compile_pattern(value)))
+      except (re.error, TypeError):
+        return None
+    elif schemaprop == "enum" and type(value) == types.ListType:
+      checks.append(_enum_check(ValueSet(value)))
+    elif schemaprop == "maxDecimal" and value is not None:
+      checks.append(_places_check(decimals.max_places(value)))
+    elif value is not None:
+      return None
+  return checks
+
+# Column checks take a column and the set of the types of its values and
+# return True if all of the values pass. A column that fails is tested
+# value by value.
+
+def _present(column, kinds):
+  return object not in kinds
+
+def _type_check(typeset):
+  typeset = typeset | frozenset([object])
+  def check(column, kinds):
+    return kinds <= typeset
+  return check
+
+def _values(column, kinds, typeset):
+  '''
+  Returns the values of the column of the given types.
+  '''
+  if kinds <= typeset:
+    return column
+  return [value for value in column if type(value) in typeset]
+
+def _range_check(lower, limit):
+  def check(column, kinds):
+    if types.ListType in kinds:
+      # Lists are checked by length.
+      return False
+    if not kinds & _numbertypes:
+      return True
+    numbers = _values(column, kinds, _numbertypes)
+    if lower:
+      bound = min(numbers)
+    else:
+      bound = max(numbers)
+    if bound != bound:
+      # min and max keep a NaN found first, as no number compares to it.
+      return False
+    if lower:
+      return not bound < limit
+    return not bound > limit
+  return check
+
+def _length_check(lower, limit):
+  def check(column, kinds):
+    if not kinds & _stringtypes:
+      return True
+    lengths = map(len, _values(column, kinds, _stringtypes))
+    if lower:
+      return not min(lengths) < limit
+    return not max(lengths) > limit
+  return check
+
+def _pattern_check(regex):
+  def check(column, kinds):
+    if not kinds & _stringtypes:
+      return True
+    return None not in map(regex.match, set(_values(column, kinds, _stringtypes)))
+  return check
+
+def _places_check(fits):
+  numbertypes = _numbertypes | frozenset([object, types.NoneType])
+  def check(column, kinds):
+    if not kinds <= numbertypes:
+      return False
+    return False not in map(fits, _values(column, kinds, _numbertypes))
+  return check
+
+def _enum_check(valueset):
+  scalartypes = frozenset(ValueSet._scalartypes) | frozenset([object])
+  def check(column, kinds):
+    if not kinds <= scalartypes:
+      return False
+    values = set(column)
+    values.discard(_MISSING)
+    values.discard(None)
+    for value in values:
+      if value not in valueset:
+        return False
+    return True
+  return check
+
+__all__ = [ 'BATCH_SIZE', 'Columns', 'plan' ]
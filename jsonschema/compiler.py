@@ -0,0 +1,1107 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Compiles a json-schema into a tree of bound checks.
+
+Validating with JSONSchemaValidator looks up and calls every validator
+method for every schema property on every node of the document. A compiled
+schema does that work once: each schema node is turned into a list of
+checks for the schema properties that are actually present, and nested
+schemas are compiled into child nodes. Validating a document then only
+runs those checks.
+
+Every check has a boolean counterpart, its ``test`` attribute, that
+returns False instead of raising a ValueError. Tests are used by
+CompiledSchema.is_valid and to try the alternatives of union types, so
+invalid documents can be rejected without building exceptions or error
+messages.
+
+Validator methods that have been overridden by a subclass of
+JSONSchemaValidator are always called as bound methods so that extensions
+keep working with compiled schemas.
+
+Schemas are checked against the meta-schema before they are compiled, see
+jsonschema.metaschema, so checks of the schema itself are never part of
+the validation of a document.
+
+Union types whose schema alternatives all require a property with
+different "enum" values are indexed by that property, see Discriminator,
+so that objects are only checked against the alternatives they can
+match. The indexes are listed by ``CompiledSchema.discriminators``.
+
+Object schemas can keep a cache of the key sets of the objects they have
+validated, see ShapeNode, so that objects of a known shape only run the
+checks of the fields they hold.
+
+The compiled schema is a snapshot of the schema object. Changes made to
+the schema after it was compiled are not seen by the compiled schema.
+'''
+
+import math, re, types
+
+from jsonschema import cache, columnar, decimals, metaschema, vectorized
+from jsonschema.canonical import ValueSet, equality_key, first_duplicate
+from jsonschema.errors import ValidationError
+
+_stringtypes = (types.StringType, types.UnicodeType)
+
+class SchemaNode:
+  '''
+  A compiled schema node. Holds the checks for the schema properties of a
+  single schema object in the order the validator processes them.
+  '''
+  
+  def __init__(self, schema, keywords, checks):
+    self.schema = schema
+    self.keywords = keywords
+    self.checks = checks
+    self.tests = [check.test for check in checks]
+  
+  def __call__(self, x, fieldname):
+    for check in self.checks:
+      check(x, fieldname)
+    return x
+  
+  def test(self, x, fieldname):
+    '''
+    Returns True if the field is valid. Has the same effect on the
+    document as calling the node up to the first failing check.
+    '''
+    for test in self.tests:
+      if not test(x, fieldname):
+        return False
+    return True
+
+class ShapeNode(SchemaNode):
+  '''
+  A compiled object schema node that plans its checks by the set of keys
+  of the object. The plan of each shape of object is kept in the size
+  bounded ``shapes`` cache, so objects with the same keys only need a
+  single lookup to know which fields have to be checked, which absent
+  fields get default values and whether additional properties have to be
+  looked at. ``plan`` builds the (checks, tests) tuple of a key set.
+  '''
+  
+  def __init__(self, schema, keywords, checks, shapes, plan):
+    SchemaNode.__init__(self, schema, keywords, checks)
+    self.shapes = shapes
+    self.plan = plan
+  
+  def _shape(self, value):
+    keys = frozenset(value)
+    shape = self.shapes.get(keys)
+    if shape is None:
+      shape = self.plan(keys)
+      self.shapes.put(keys, shape)
+    return shape
+  
+  def __call__(self, x, fieldname):
+    value = x.get(fieldname)
+    if type(value) == types.DictType:
+      for check in self._shape(value)[0]:
+        check(x, fieldname)
+      return x
+    return SchemaNode.__call__(self, x, fieldname)
+  
+  def test(self, x, fieldname):
+    value = x.get(fieldname)
+    if type(value) == types.DictType:
+      for test in self._shape(value)[1]:
+        if not test(x, fieldname):
+          return False
+      return True
+    return SchemaNode.test(self, x, fieldname)
+
+# Marks objects that don't have the property of a Discriminator. Nothing
+# else is of the type object.
+_MISSING = object()
+
+class Discriminator:
+  '''
+  An index of the schema alternatives of a union type by the value of a
+  property that all of them require and restrict with "enum", such as
+  {"kind": {"enum": ["click"]}}. Objects are only matched against the
+  alternatives that allow their value of the property.
+  
+  ``property`` is the name of the property, ``alternatives`` the list of
+  schema alternatives and ``index`` maps the equality key of each allowed
+  value (see jsonschema.canonical.equality_key) to the positions of the
+  alternatives in that list that allow it.
+  '''
+  
+  def __init__(self, name, alternatives, index, matchers):
+    self.property = name
+    self.alternatives = alternatives
+    self.index = index
+    self._matchers = matchers
+    self._candidates = dict([(key, [matchers[position] for position in positions])
+                             for key, positions in index.items()])
+  
+  def candidates(self, value):
+    '''
+    Returns the matchers of the alternatives that the given object can
+    match.
+    '''
+    key = value.get(self.property, _MISSING)
+    if key is _MISSING:
+      # The property is required by all of the alternatives.
+      return ()
+    if key is None:
+      # "enum" allows null values.
+      return self._matchers
+    try:
+      return self._candidates.get(equality_key(key), ())
+    except TypeError:
+      return self._matchers
+  
+  def __repr__(self):
+    return "<Discriminator %r of %d alternatives>" % (self.property, len(self.alternatives))
+
+class CompiledSchema:
+  '''
+  A json-schema compiled against a validator instance. Can be used to
+  validate any number of json documents.
+  '''
+  
+  def __init__(self, validator, schema, root, shapes=(), discriminators=(),
+               columns=None):
+    self.validator = validator
+    self.schema = schema
+    self.root = root
+    self.shapes = shapes
+    # The Discriminator of each union type that has one.
+    self.discriminators = discriminators
+    # The columnar.Columns of the schema if its documents can be validated
+    # column by column.
+    self.columns = columns
+  
+  def validate(self, data):
+    '''
+    Validates a piece of json data against the compiled json-schema.
+    '''
+    self.validator._begin(self.schema)
+    self.root({"_data": data}, "_data")
+  
+  def is_valid(self, data):
+    '''
+    Returns True if the piece of json data is valid against the compiled
+    json-schema and False otherwise. No exceptions or error messages are
+    built for invalid data.
+    '''
+    self.validator._begin(self.schema)
+    return self.root.test({"_data": data}, "_data")
+  
+  def validate_many(self, documents, columnar=False):
+    '''
+    Validates each piece of json data of the given iterable against the
+    compiled json-schema. Yields an (index, ok, error) tuple for each
+    document where ``error`` is the ValueError raised for the document or
+    None if it is valid. Validation errors are not raised.
+    
+    If ``columnar`` is True, documents of flat object schemas are
+    validated in batches column by column, see jsonschema.columnar. The
+    results are the same, but a whole batch is taken from the iterable
+    before its results are yielded.
+    '''
+    if columnar and self.columns is not None:
+      return self.columns.validate_many(self, documents)
+    return self._validate_rows(documents)
+  
+  def _validate_rows(self, documents):
+    self.validator._begin(self.schema)
+    root = self.root
+    # The wrapper dictionary is shared by all documents.
+    x = {}
+    for index, data in enumerate(documents):
+      x["_data"] = data
+      try:
+        root(x, "_data")
+      except ValueError, e:
+        yield (index, False, e)
+      else:
+        yield (index, True, None)
+  
+  def shape_stats(self):
+    '''
+    Returns the hit, miss and eviction counts and the sizes of the shape
+    caches of all of the object schemas added up, along with the number
+    of ``caches``. See jsonschema.compile.
+    '''
+    stats = {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "maxsize": 0}
+    for shapes in self.shapes:
+      for key, value in shapes.stats().items():
+        stats[key] += value
+    stats["caches"] = len(self.shapes)
+    return stats
+
+def _checks(check, test):
+  '''
+  Attaches the boolean test to the check function and returns the check.
+  '''
+  check.test = test
+  return check
+
+def _fails(x, fieldname):
+  return False
+
+def _fields_check(fields):
+  '''
+  Returns the check of the given (fieldname, node) tuples of the fields
+  of an object.
+  '''
+  def check(x, fieldname):
+    value = x.get(fieldname)
+    try:
+      for eachProp, node in fields:
+        node(value, eachProp)
+    except ValidationError, e:
+      e.path.insert(0, fieldname)
+      raise
+  def test(x, fieldname):
+    value = x.get(fieldname)
+    for eachProp, node in fields:
+      if not node.test(value, eachProp):
+        return False
+    return True
+  return _checks(check, test)
+
+class SchemaCompiler:
+  '''
+  Compiles json-schema objects into trees of SchemaNode objects using the
+  validator methods of the given validator instance.
+  
+  Schema properties are compiled by the compile_<property> methods. These
+  return a check function taking the arguments (x, fieldname), or None if
+  the property does not need to be checked at all. The check has a
+  ``test`` attribute taking the same arguments that returns False where
+  the check would raise a ValueError. The compile_<property> methods are
+  only used if the matching validator method has not been overridden.
+  '''
+  
+  def __init__(self, validator, shape_cache=0):
+    self.validator = validator
+    self.shape_cache = shape_cache
+    self.shapes = []
+    self.discriminators = []
+  
+  def compile(self, schema):
+    '''
+    Compiles the given json-schema and returns a CompiledSchema object.
+    Raises a SchemaError if the schema is not valid against the
+    meta-schema.
+    '''
+    metaschema.check_schema(schema, self.validator)
+    root = self.compile_node(schema)
+    return CompiledSchema(self.validator, schema, root, self.shapes,
+                          self.discriminators, columnar.plan(self, schema, root))
+  
+  def compile_node(self, schema):
+    '''
+    Compiles a single schema object and all of its sub schemas.
+    '''
+    if schema is None:
+      return SchemaNode(schema, [], [])
+    if not type(schema) == types.DictType:
+      return SchemaNode(schema, [], [self.invalid("Schema structure is invalid.")])
+    
+    keywords = list(self.validator._schema_keywords(schema))
+    checks = []
+    for schemaprop in keywords:
+      check = self.compile_keyword(schema, schemaprop)
+      if check is not None:
+        checks.append(check)
+    if self.shape_cache:
+      return self.compile_shapes(schema, keywords, checks)
+    return SchemaNode(schema, keywords, checks)
+  
+  def _compiled_only(self, keywords):
+    '''
+    Returns True if none of the given schema properties are checked by
+    calling validator methods.
+    '''
+    for schemaprop in keywords:
+      if self.validator._is_overridden(schemaprop) or \
+         not hasattr(self, "compile_"+schemaprop):
+        return False
+    return True
+  
+  def compile_shapes(self, schema, keywords, checks):
+    '''
+    Returns a ShapeNode for an object schema with properties, or a
+    SchemaNode for other schemas.
+    '''
+    properties = [check for check in checks if hasattr(check, "fields")]
+    if not properties:
+      return SchemaNode(schema, keywords, checks)
+    properties = properties[0]
+    
+    fields = []
+    for eachProp, node, present in properties.fields:
+      # Absent fields are skipped if their checks pass without changing
+      # anything when the field is missing.
+      absent = node
+      if "id" not in node.keywords and self._compiled_only(node.keywords):
+        probe = {}
+        if node.test(probe, eachProp) and not probe:
+          absent = None
+      fields.append((eachProp, present, absent))
+    # Validator methods could add any field to the object.
+    compiled = self._compiled_only(keywords)
+    
+    def plan(keys):
+      nodes = []
+      for eachProp, present, absent in fields:
+        if eachProp in keys:
+          if present is not None:
+            nodes.append((eachProp, present))
+        elif absent is not None:
+          nodes.append((eachProp, absent))
+      shape = []
+      for check in checks:
+        if check is properties:
+          check = _fields_check(nodes)
+        elif compiled and hasattr(check, "declared") and keys <= check.declared:
+          # Defaults only add declared fields.
+          continue
+        shape.append(check)
+      return (shape, [check.test for check in shape])
+    
+    shapes = cache.LRUCache(self.shape_cache)
+    self.shapes.append(shapes)
+    return ShapeNode(schema, keywords, checks, shapes, plan)
+  
+  def compile_keyword(self, schema, schemaprop):
+    '''
+    Compiles a single property of the given schema object.
+    '''
+    value = schema.get(schemaprop)
+    if self.validator._is_overridden(schemaprop) or \
+       not hasattr(self, "compile_"+schemaprop):
+      return self.bound(schemaprop, schema, value)
+    return getattr(self, "compile_"+schemaprop)(schema, value)
+  
+  def invalid(self, message):
+    '''
+    Returns a check that always fails with the given message.
+    '''
+    def check(x, fieldname):
+      raise ValueError(message)
+    return _checks(check, _fails)
+  
+  def bound(self, schemaprop, schema, value):
+    '''
+    Returns a check that calls the validator method for the given schema
+    property.
+    '''
+    validator = getattr(self.validator, "validate_"+schemaprop, None)
+    if validator is None:
+      return self.invalid("Schema property '%s' is not supported" % schemaprop)
+    
+    def check(x, fieldname):
+      try:
+        validator(x, fieldname, schema, value)
+      except AttributeError:
+        raise ValueError("Schema property '%s' is not supported" % schemaprop)
+    def test(x, fieldname):
+      # Validator methods can only report errors by raising them.
+      try:
+        validator(x, fieldname, schema, value)
+      except (ValueError, AttributeError):
+        return False
+      return True
+    return _checks(check, test)
+  
+  def compile_noop(self, schema, value):
+    '''
+    Schema properties that have no effect on validation are dropped.
+    '''
+    return None
+  
+  compile_options = compile_readonly = compile_noop
+  compile_format = compile_transient = compile_hidden = compile_noop
+  compile_extends = compile_noop
+  
+  def compile_id(self, schema, ID):
+    if ID is None:
+      return None
+    if ID == "$":
+      def check(x, fieldname):
+        raise ValueError("Reference id for field '%s' cannot equal '$'" % fieldname)
+      return _checks(check, _fails)
+    
+    validator = self.validator
+    def check(x, fieldname):
+      validator._refmap[ID] = schema
+      return True
+    return _checks(check, check)
+  
+  def compile_type(self, schema, fieldtype):
+    try:
+      converted_fieldtype = self.validator._convert_type(fieldtype)
+    except ValueError:
+      return self.bound("type", schema, fieldtype)
+    
+    if converted_fieldtype is None:
+      return None
+    if type(converted_fieldtype) == types.DictType:
+      node = self.compile_node(converted_fieldtype)
+      def check(x, fieldname):
+        if fieldname in x:
+          node(x, fieldname)
+      def test(x, fieldname):
+        return fieldname not in x or node.test(x, fieldname)
+      return _checks(check, test)
+    
+    matches = self._type_matcher(converted_fieldtype)
+    def check(x, fieldname):
+      if fieldname in x and not matches(x, fieldname):
+        raise ValidationError("Value %r for field '%s' is not of type %r", (x.get(fieldname), fieldname, fieldtype), "type", fieldname, x.get(fieldname), fieldtype)
+    def test(x, fieldname):
+      return fieldname not in x or matches(x, fieldname)
+    return _checks(check, test)
+  
+  def _type_matcher(self, converted_fieldtype):
+    '''
+    Returns a function taking the arguments (x, fieldname) that returns
+    True if the field matches the given converted field type.
+    '''
+    if converted_fieldtype is None:
+      return lambda x, fieldname: True
+    if type(converted_fieldtype) == types.DictType:
+      return self.compile_node(converted_fieldtype).test
+    if type(converted_fieldtype) == types.ListType:
+      typelist = self._flatten_types(converted_fieldtype)
+      if typelist is not None:
+        if None in typelist:
+          # "any" matches everything
+          return lambda x, fieldname: True
+        typetuple = tuple(typelist)
+        return lambda x, fieldname: type(x[fieldname]) in typetuple
+      
+      alternatives = []
+      typelist = []
+      schemas = []
+      schemaobjects = []
+      for eachtype in self._flatten_alternatives(converted_fieldtype):
+        if type(eachtype) == types.DictType:
+          matcher = self._schema_matcher(eachtype)
+          schemas.append(matcher)
+          schemaobjects.append(eachtype)
+        else:
+          matcher = self._type_matcher(eachtype)
+          typelist.append(eachtype)
+        alternatives.append(matcher)
+      
+      if not [matcher for matcher in schemas if matcher.effects]:
+        # The order of the alternatives only matters when trying a schema
+        # alternative can change the document, otherwise the types are
+        # matched at once and only the schemas that can match are tried.
+        if None in typelist:
+          return lambda x, fieldname: True
+        typetuple = tuple(typelist)
+        discriminator = self._discriminator(schemaobjects, schemas)
+        def matches(x, fieldname):
+          value = x[fieldname]
+          if type(value) in typetuple:
+            return True
+          if discriminator is not None and type(value) == types.DictType:
+            candidates = discriminator.candidates(value)
+          else:
+            candidates = schemas
+          for alternative in candidates:
+            if alternative(x, fieldname):
+              return True
+          return False
+        return matches
+      
+      def matches(x, fieldname):
+        for alternative in alternatives:
+          if alternative(x, fieldname):
+            return True
+        return False
+      return matches
+    return lambda x, fieldname: type(x[fieldname]) == converted_fieldtype
+  
+  def _flatten_types(self, converted_fieldtype):
+    '''
+    Returns the list of python types matched by the given converted
+    field type, or None if it contains schema objects.
+    '''
+    if type(converted_fieldtype) == types.ListType:
+      typelist = []
+      for eachtype in converted_fieldtype:
+        subtypes = self._flatten_types(eachtype)
+        if subtypes is None:
+          return None
+        typelist.extend(subtypes)
+      return typelist
+    elif type(converted_fieldtype) == types.DictType:
+      return None
+    return [converted_fieldtype]
+  
+  def _flatten_alternatives(self, converted_fieldtype):
+    '''
+    Returns the python types and schema objects of the given converted
+    field type in order.
+    '''
+    if type(converted_fieldtype) == types.ListType:
+      alternatives = []
+      for eachtype in converted_fieldtype:
+        alternatives.extend(self._flatten_alternatives(eachtype))
+      return alternatives
+    return [converted_fieldtype]
+  
+  def _schema_matcher(self, schema):
+    '''
+    Returns a function taking the arguments (x, fieldname) that returns
+    True if the field is valid against the schema alternative of a union
+    type. The ``effects`` attribute of the function is True if trying the
+    schema can change the document or the state of the validator.
+    
+    Schemas that have no effects are first checked cheaply against the
+    type of the value, the presence of the required properties and the
+    types of the required properties, which rejects most of the
+    alternatives that don't match without validating them.
+    '''
+    test = self.compile_node(schema).test
+    if self._has_effects(schema):
+      matches = lambda x, fieldname: test(x, fieldname)
+      matches.effects = True
+      return matches
+    
+    typetuple = None
+    try:
+      typelist = self._flatten_types(self.validator._convert_type(schema.get("type")))
+    except ValueError:
+      typelist = None
+    if typelist is not None and None not in typelist:
+      typetuple = tuple(typelist)
+    
+    required = []
+    proptypes = []
+    properties = schema.get("properties")
+    if type(properties) == types.DictType:
+      for eachProp, propschema in properties.items():
+        if type(propschema) == types.DictType and not propschema.get("optional"):
+          required.append(eachProp)
+          try:
+            propconverted = self.validator._convert_type(propschema.get("type"))
+          except ValueError:
+            continue
+          typelist = self._flatten_types(propconverted)
+          if typelist is not None and typelist and None not in typelist:
+            proptypes.append((eachProp, tuple(typelist)))
+    required = frozenset(required)
+    
+    def matches(x, fieldname):
+      value = x[fieldname]
+      if typetuple is not None and type(value) not in typetuple:
+        return False
+      if type(value) == types.DictType:
+        if not value.viewkeys() >= required:
+          return False
+        for eachProp, proptypetuple in proptypes:
+          if type(value[eachProp]) not in proptypetuple:
+            return False
+      return test(x, fieldname)
+    matches.effects = False
+    return matches
+  
+  def _discriminator(self, alternatives, matchers):
+    '''
+    Returns a Discriminator for the given schema alternatives of a union
+    type, or None if they don't have a property that tells them apart.
+    Of the properties that all of the alternatives require and restrict
+    with "enum", the one that leaves the fewest alternatives to try for
+    any value is used.
+    '''
+    if len(alternatives) < 2:
+      return None
+    
+    names = None
+    for schema in alternatives:
+      properties = schema.get("properties")
+      if type(properties) != types.DictType:
+        return None
+      pinned = set()
+      for eachProp, propschema in properties.items():
+        if type(propschema) == types.DictType and not propschema.get("optional") and \
+           type(propschema.get("enum")) == types.ListType:
+          pinned.add(eachProp)
+      if names is None:
+        names = pinned
+      else:
+        names &= pinned
+    
+    best = None
+    for name in sorted(names):
+      index = {}
+      try:
+        for position, schema in enumerate(alternatives):
+          for value in schema["properties"][name]["enum"]:
+            if value is not None:
+              positions = index.setdefault(equality_key(value), [])
+              if not positions or positions[-1] != position:
+                positions.append(position)
+      except TypeError:
+        continue
+      if not index:
+        continue
+      widest = max([len(positions) for positions in index.values()])
+      if widest < len(alternatives) and (best is None or widest < best[0]):
+        best = (widest, name, index)
+    if best is None:
+      return None
+    
+    discriminator = Discriminator(best[1], alternatives, best[2], matchers)
+    # The same union can be compiled more than once, such as by the code
+    # generator for its two functions.
+    for each in self.discriminators:
+      if each.property == discriminator.property and \
+         len(each.alternatives) == len(alternatives) and \
+         not [schema for schema, other in zip(each.alternatives, alternatives) if schema is not other]:
+        break
+    else:
+      self.discriminators.append(discriminator)
+    return discriminator
+  
+  def _has_effects(self, schema):
+    '''
+    Returns True if validating against the schema can change the
+    document or the state of the validator: the schema or one of its sub
+    schemas has a default value or an id, or is checked by a validator
+    method that has been overridden or added by a subclass.
+    '''
+    validator = self.validator
+    for schemaprop in validator._schemadefault.keys():
+      if validator._is_overridden(schemaprop):
+        return True
+    stack = [schema]
+    while stack:
+      each = stack.pop()
+      if type(each) == types.ListType:
+        stack.extend(each)
+      elif type(each) == types.DictType:
+        if "default" in each or "id" in each:
+          return True
+        for schemaprop, value in each.items():
+          if schemaprop == "properties" and type(value) == types.DictType:
+            stack.extend(value.values())
+          elif schemaprop in ("items", "additionalProperties", "type", "disallow"):
+            stack.append(value)
+          elif schemaprop not in validator._schemadefault and \
+               hasattr(validator, "validate_%s" % schemaprop):
+            return True
+    return False
+  
+  def compile_disallow(self, schema, disallow):
+    if self.validator._is_overridden("type"):
+      return self.bound("disallow", schema, disallow)
+    
+    typecheck = self.compile_type(schema, disallow)
+    if typecheck is None:
+      typetest = lambda x, fieldname: True
+    else:
+      typetest = typecheck.test
+    def check(x, fieldname):
+      if typetest(x, fieldname):
+        raise ValidationError("Value %r of type %s is disallowed for field '%s'", (x.get(fieldname), disallow, fieldname), "disallow", fieldname, x.get(fieldname), disallow)
+    def test(x, fieldname):
+      return not typetest(x, fieldname)
+    return _checks(check, test)
+  
+  def compile_properties(self, schema, properties):
+    if not type(properties) == types.DictType:
+      return self.bound("properties", schema, properties)
+    
+    children = []
+    # The nodes of the fields without the checks for required fields, used
+    # once all of the required fields are known to be present.
+    present = []
+    required = []
+    # (fieldname, node, node when present) tuples for compile_shapes.
+    fields = []
+    for eachProp in properties.keys():
+      node = self.compile_node(properties.get(eachProp))
+      children.append((eachProp, node))
+      checks = [check for check in node.checks if not getattr(check, "required", False)]
+      presentnode = node
+      if len(checks) < len(node.checks):
+        required.append(eachProp)
+        keywords = [keyword for keyword in node.keywords if keyword != "optional"]
+        presentnode = SchemaNode(node.schema, keywords, checks)
+      if presentnode.checks:
+        present.append((eachProp, presentnode))
+      else:
+        presentnode = None
+      fields.append((eachProp, node, presentnode))
+    required = frozenset(required)
+    
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) == types.DictType:
+        # Defaults only ever add fields, so the required fields checked up
+        # front stay present.
+        if value.viewkeys() >= required:
+          nodes = present
+        else:
+          nodes = children
+        try:
+          for eachProp, node in nodes:
+            node(value, eachProp)
+        except ValidationError, e:
+          e.path.insert(0, fieldname)
+          raise
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) == types.DictType:
+        if value.viewkeys() >= required:
+          nodes = present
+        else:
+          nodes = children
+        for eachProp, node in nodes:
+          if not node.test(value, eachProp):
+            return False
+      return True
+    check = _checks(check, test)
+    check.fields = fields
+    return check
+  
+  def compile_items(self, schema, items):
+    if type(items) == types.DictType:
+      node = self.compile_node(items)
+      # Long lists of numbers and strings only check the items that may
+      # fail, see jsonschema.vectorized.
+      select = vectorized.items_filter(self.validator, items)
+      def check(x, fieldname):
+        value = x.get(fieldname)
+        if type(value) == types.ListType:
+          # A single container is reused for all of the items.
+          item = {}
+          candidates = value
+          if select is not None:
+            candidates = select(value)
+          for eachItem in candidates:
+            item["_data"] = eachItem
+            try:
+              node(item, "_data")
+            except ValueError, e:
+              raise ValidationError("Failed to validate field '%s' list schema: %r", (fieldname, e), "items", fieldname, value, items, e)
+      def test(x, fieldname):
+        value = x.get(fieldname)
+        if type(value) == types.ListType:
+          item = {}
+          candidates = value
+          if select is not None:
+            candidates = select(value)
+          for eachItem in candidates:
+            item["_data"] = eachItem
+            if not node.test(item, "_data"):
+              return False
+        return True
+      return _checks(check, test)
+    elif type(items) == types.ListType:
+      nodes = [self.compile_node(eachItem) for eachItem in items]
+      def check(x, fieldname):
+        value = x.get(fieldname)
+        if type(value) == types.ListType:
+          if len(nodes) == len(value):
+            item = {}
+            for itemIndex in range(len(nodes)):
+              item["_data"] = value[itemIndex]
+              try:
+                nodes[itemIndex](item, "_data")
+              except ValueError, e:
+                raise ValidationError("Failed to validate field '%s' list schema: %r", (fieldname, e), "items", fieldname, value, items, e)
+          else:
+            raise ValidationError("Length of list %r for field '%s' is not equal to length of schema list", (value, fieldname), "items", fieldname, value, items)
+      def test(x, fieldname):
+        value = x.get(fieldname)
+        if type(value) == types.ListType:
+          if len(nodes) != len(value):
+            return False
+          item = {}
+          for itemIndex in range(len(nodes)):
+            item["_data"] = value[itemIndex]
+            if not nodes[itemIndex].test(item, "_data"):
+              return False
+        return True
+      return _checks(check, test)
+    return self.bound("items", schema, items)
+  
+  def compile_optional(self, schema, optional):
+    if optional:
+      return None
+    def check(x, fieldname):
+      if fieldname not in x:
+        raise ValidationError("Required field '%s' is missing", (fieldname,), "optional", fieldname)
+    def test(x, fieldname):
+      return fieldname in x
+    check = _checks(check, test)
+    # Marks the check for compile_properties, which checks the presence of
+    # all of the required fields of an object at once.
+    check.required = True
+    return check
+  
+  def compile_additionalProperties(self, schema, additionalProperties):
+    if type(additionalProperties) == types.BooleanType:
+      if additionalProperties:
+        return None
+      node = None
+    elif type(additionalProperties) == types.DictType:
+      node = self.compile_node(additionalProperties)
+    else:
+      return self.bound("additionalProperties", schema, additionalProperties)
+    
+    properties = schema.get("properties")
+    if properties is None:
+      properties = {}
+    if type(properties) == types.DictType:
+      declared = frozenset(properties)
+    else:
+      declared = frozenset()
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) == types.DictType and value.viewkeys() <= declared:
+        return
+      try:
+        keys = value.keys()
+      except AttributeError:
+        raise ValueError("Schema property 'additionalProperties' is not supported")
+      for eachProperty in keys:
+        if eachProperty not in properties:
+          if node is None:
+            raise ValidationError("Additional properties not defined by 'properties' are not allowed in field '%s'", (fieldname,), "additionalProperties", fieldname, value, additionalProperties)
+          try:
+            node(value, eachProperty)
+          except ValidationError, e:
+            e.path.insert(0, fieldname)
+            raise
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) == types.DictType and value.viewkeys() <= declared:
+        return True
+      try:
+        keys = value.keys()
+      except AttributeError:
+        return False
+      for eachProperty in keys:
+        if eachProperty not in properties:
+          if node is None or not node.test(value, eachProperty):
+            return False
+      return True
+    check = _checks(check, test)
+    # The declared properties for compile_shapes.
+    check.declared = declared
+    return check
+  
+  def compile_requires(self, schema, requires):
+    if requires is None:
+      return None
+    def check(x, fieldname):
+      if x.get(fieldname) is not None and x.get(requires) is None:
+        raise ValidationError("Field '%s' is required by field '%s'", (requires, fieldname), "requires", fieldname, x.get(fieldname), requires)
+    def test(x, fieldname):
+      return x.get(fieldname) is None or x.get(requires) is not None
+    return _checks(check, test)
+  
+  def compile_minimum(self, schema, minimum):
+    if minimum is None:
+      return None
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      valuetype = type(value)
+      if (valuetype is int or valuetype is float) and value < minimum:
+        raise ValidationError("Value %r for field '%s' is less than minimum value: %f", (value, fieldname, minimum), "minimum", fieldname, value, minimum)
+      elif valuetype is list and len(value) < minimum:
+        raise ValidationError("Value %r for field '%s' has fewer values than the minimum: %f", (value, fieldname, minimum), "minimum", fieldname, value, minimum)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      valuetype = type(value)
+      if valuetype is int or valuetype is float:
+        return not value < minimum
+      elif valuetype is list:
+        return not len(value) < minimum
+      return True
+    return _checks(check, test)
+  
+  def compile_maximum(self, schema, maximum):
+    if maximum is None:
+      return None
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      valuetype = type(value)
+      if (valuetype is int or valuetype is float) and value > maximum:
+        raise ValidationError("Value %r for field '%s' is greater than maximum value: %f", (value, fieldname, maximum), "maximum", fieldname, value, maximum)
+      elif valuetype is list and len(value) > maximum:
+        raise ValidationError("Value %r for field '%s' has more values than the maximum: %f", (value, fieldname, maximum), "maximum", fieldname, value, maximum)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      valuetype = type(value)
+      if valuetype is int or valuetype is float:
+        return not value > maximum
+      elif valuetype is list:
+        return not len(value) > maximum
+      return True
+    return _checks(check, test)
+  
+  def compile_minItems(self, schema, minitems):
+    if minitems is None:
+      return None
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) == types.ListType and len(value) < minitems:
+        raise ValidationError("Value %r for field '%s' must have a minimum of %d items", (fieldname, fieldname, minitems), "minItems", fieldname, value, minitems)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      return not (type(value) == types.ListType and len(value) < minitems)
+    return _checks(check, test)
+  
+  def compile_maxItems(self, schema, maxitems):
+    if maxitems is None:
+      return None
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) == types.ListType and len(value) > maxitems:
+        raise ValidationError("Value %r for field '%s' must have a maximum of %d items", (value, fieldname, maxitems), "maxItems", fieldname, value, maxitems)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      return not (type(value) == types.ListType and len(value) > maxitems)
+    return _checks(check, test)
+  
+  def compile_identity(self, schema, unique):
+    return self._unique("identity", unique)
+  
+  def compile_uniqueItems(self, schema, unique):
+    return self._unique("uniqueItems", unique)
+  
+  def _unique(self, schemaprop, unique):
+    if not unique:
+      return None
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) == types.ListType:
+        duplicate = first_duplicate(value)
+        if duplicate is not None:
+          raise ValidationError("Value %r for field '%s' has equal items at indexes %d and %d", (value, fieldname) + duplicate, schemaprop, fieldname, value, unique)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      return not (type(value) == types.ListType and first_duplicate(value) is not None)
+    return _checks(check, test)
+  
+  def compile_pattern(self, schema, pattern):
+    if pattern is None:
+      return None
+    try:
+      regex = cache.compile_pattern(pattern)
+    except (re.error, TypeError):
+      # Invalid patterns fail when a string is validated.
+      return self.bound("pattern", schema, pattern)
+    
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) in _stringtypes and not regex.match(value):
+        raise ValidationError("Value %r for field '%s' does not match regular expression '%s'", (value, fieldname, pattern), "pattern", fieldname, value, pattern)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      return type(value) not in _stringtypes or regex.match(value) is not None
+    return _checks(check, test)
+  
+  def compile_maxLength(self, schema, length):
+    if length is None:
+      return None
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) in _stringtypes and len(value) > length:
+        raise ValidationError("Length of value %r for field '%s' must be less than or equal to %f", (value, fieldname, length), "maxLength", fieldname, value, length)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      return not (type(value) in _stringtypes and len(value) > length)
+    return _checks(check, test)
+  
+  def compile_minLength(self, schema, length):
+    if length is None:
+      return None
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if type(value) in _stringtypes and len(value) < length:
+        raise ValidationError("Length of value %r for field '%s' must be more than or equal to %f", (value, fieldname, length), "minLength", fieldname, value, length)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      return not (type(value) in _stringtypes and len(value) < length)
+    return _checks(check, test)
+  
+  def compile_enum(self, schema, options):
+    if options is None:
+      return None
+    if not type(options) == types.ListType:
+      return self.bound("enum", schema, options)
+    
+    valueset = ValueSet(options)
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if value is not None and value not in valueset:
+        raise ValidationError("Value %r for field '%s' is not in the enumeration: %r", (value, fieldname, options), "enum", fieldname, value, options)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      return value is None or value in valueset
+    return _checks(check, test)
+  
+  def compile_title(self, schema, title):
+    if title is None or self.validator._is_string_type(title):
+      return None
+    def check(x, fieldname):
+      raise ValueError("The title for field '%s' must be a string" % fieldname)
+    return _checks(check, _fails)
+  
+  def compile_description(self, schema, description):
+    if description is None or self.validator._is_string_type(description):
+      return None
+    def check(x, fieldname):
+      raise ValueError("The description for field '%s' must be a string." % fieldname)
+    return _checks(check, _fails)
+  
+  def compile_default(self, schema, default):
+    if not self.validator._interactive_mode or default is None or \
+       schema.get("readonly"):
+      return None
+    def check(x, fieldname):
+      if fieldname not in x:
+        x[fieldname] = default
+      return True
+    return _checks(check, check)
+  
+  def compile_maxDecimal(self, schema, maxdecimal):
+    if maxdecimal is None:
+      return None
+    fits = decimals.max_places(maxdecimal)
+    scale = decimals.float_scale(maxdecimal)
+    if scale is None:
+      # No float passes the inline test.
+      scale = float("nan")
+    floor = math.floor
+    def check(x, fieldname):
+      value = x.get(fieldname)
+      if value is not None:
+        # Most valid floats pass the test of decimals.max_places inline.
+        if type(value) is float and floor(value * scale + 0.5) / scale == value:
+          return
+        if not fits(value):
+          raise ValidationError("Value %r for field '%s' must not have more than %d decimal places", (value, fieldname, maxdecimal), "maxDecimal", fieldname, value, maxdecimal)
+    def test(x, fieldname):
+      value = x.get(fieldname)
+      if value is not None:
+        if type(value) is float and floor(value * scale + 0.5) / scale == value:
+          return True
+        try:
+          return fits(value)
+        except UnicodeError:
+          return False
+      return True
+    return _checks(check, test)
+
+__all__ = [ 'CompiledSchema', 'Discriminator', 'SchemaCompiler', 'SchemaNode',
+            'ShapeNode' ]
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Decimal places of numbers for the maxDecimal schema property.
+
+The decimal places of a number are counted from its value rather than
+from the string str() makes of it. Ints have none. Floats have the
+decimal places of the shortest string that reads back as the same float,
+which is what repr() writes, so 1e-05 has 5 decimal places and 1.5e+20
+has none. Decimal objects have the decimal places of their value, so
+trailing zeros are not counted. Infinities and NaN have none.
+
+Checking that a float has no more than ``maxdecimal`` decimal places is
+done with arithmetic: if rounding the float scaled by 10**maxdecimal to an
+integer and scaling it back gives the same float, the float is the
+nearest float to a number with that many decimal places and passes.
+Only the floats that fail this test are looked at as decimal strings.
+
+Values other than numbers are checked the way the validator always has,
+by counting the characters after the first "." of str(value).
+'''
+
+import math, types
+from decimal import Decimal
+
+# Scale factors up to this many decimal places are exact floats.
+_exactplaces = 22
+
+_inttypes = (types.IntType, types.LongType)
+
+_inf = float("inf")
+
+def decimal_places(value):
+  '''
+  Returns the number of decimal places of an int, long, float or Decimal
+  value, or None for other values.
+  
+  >>> from jsonschema.decimals import decimal_places
+  >>> [decimal_places(v) for v in (10, 10.25, 0.1+0.2, 1e-05, 1.5e+20, Decimal("1.500"))]
+  [0, 2, 17, 5, 0, 1]
+  '''
+  valuetype = type(value)
+  if valuetype in _inttypes:
+    return 0
+  elif valuetype is types.FloatType:
+    if value != value or value in (_inf, -_inf):
+      return 0
+    value = Decimal(repr(value))
+  elif not isinstance(value, Decimal):
+    return None
+  elif not value.is_finite():
+    return 0
+  sign, digits, exponent = value.as_tuple()
+  # Trailing zeros of the digits are not decimal places.
+  zeros = 0
+  while zeros < len(digits) and digits[-1-zeros] == 0:
+    zeros += 1
+  if zeros == len(digits):
+    return 0
+  return max(0, -exponent - zeros)
+
+def _string_places(value):
+  maxdecstring = str(value)
+  return len(maxdecstring[maxdecstring.find(".")+1:])
+
+def has_max_places(value, maxdecimal):
+  '''
+  Returns True if the value has no more than ``maxdecimal`` decimal
+  places. Raises UnicodeError for non-ascii unicode strings, which str()
+  can't convert.
+  '''
+  places = decimal_places(value)
+  if places is None:
+    places = _string_places(value)
+  return places <= maxdecimal
+
+def max_places(maxdecimal):
+  '''
+  Returns a function that takes a value and returns
+  ``has_max_places(value, maxdecimal)``, with the scale factor of floats
+  computed once.
+  '''
+  floor = math.floor
+  scale = float_scale(maxdecimal)
+  def fits(value):
+    valuetype = type(value)
+    if valuetype is types.FloatType:
+      if scale is not None and floor(value * scale + 0.5) / scale == value:
+        return True
+    elif valuetype in _inttypes:
+      return True
+    elif valuetype is Decimal:
+      # The exponent of infinities and NaN is a string.
+      exponent = value.as_tuple()[2]
+      if type(exponent) is types.IntType and exponent >= -maxdecimal:
+        return True
+    return has_max_places(value, maxdecimal)
+  return fits
+
+def float_scale(maxdecimal):
+  '''
+  Returns the exact float scale factor of the given number of decimal
+  places, or None if there is none.
+  '''
+  if type(maxdecimal) in _inttypes and 0 <= maxdecimal <= _exactplaces:
+    return 10.0**maxdecimal
+  return None
+
+__all__ = [ 'decimal_places', 'has_max_places', 'max_places', 'float_scale' ]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Validation and schema errors.
+
+A ValidationError keeps the schema property that failed, the path of the
+field, the invalid value and the limit it was checked against. The error
+message is only formatted when it is asked for, and values are shown with
+a repr that is cut off after ``ValidationError.maxrepr`` characters, so
+rejecting a large document does not turn the whole document into a
+string.
+'''
+
+import re, types
+
+_stringtypes = (types.StringType, types.UnicodeType)
+
+# Conversion specifiers of % format strings.
+_conversion = re.compile(r"%(?:\([^)]*\))?[-#0 +]*(?:\*|\d+)?(?:\.(?:\*|\d+))?[hlL]?(.)")
+
+# Positions of the %r conversions by message template.
+_reprpositions = {}
+
+def _repr_positions(template):
+  positions = _reprpositions.get(template)
+  if positions is None:
+    conversions = [c for c in _conversion.findall(template) if c != "%"]
+    positions = frozenset([index for index, c in enumerate(conversions) if c == "r"])
+    _reprpositions[template] = positions
+  return positions
+
+def _list_pieces(value):
+  yield "["
+  first = True
+  for item in value:
+    if first:
+      first = False
+    else:
+      yield ", "
+    yield (item,)
+  yield "]"
+
+def _dict_pieces(value):
+  yield "{"
+  first = True
+  for key, item in value.iteritems():
+    if first:
+      first = False
+    else:
+      yield ", "
+    yield (key,)
+    yield ": "
+    yield (item,)
+  yield "}"
+
+def bounded_repr(value, size):
+  '''
+  Returns the repr of the value, cut off after ``size`` characters and
+  followed by "..." if it is longer. Only the beginning of large lists,
+  dictionaries and strings is looked at. If ``size`` is None the full
+  repr is returned.
+  '''
+  if size is None:
+    return repr(value)
+  pieces = []
+  length = 0
+  # Nested lists and dictionaries are written by a stack of generators
+  # that yield strings and 1-tuples holding the values to write next.
+  stack = [iter([(value,)])]
+  while stack:
+    try:
+      piece = stack[-1].next()
+    except StopIteration:
+      stack.pop()
+      continue
+    if type(piece) is tuple:
+      item = piece[0]
+      itemtype = type(item)
+      if itemtype is list:
+        stack.append(_list_pieces(item))
+        continue
+      elif itemtype is dict:
+        stack.append(_dict_pieces(item))
+        continue
+      elif itemtype in _stringtypes and len(item) > size:
+        piece = repr(item[:size])
+      else:
+        piece = repr(item)
+    pieces.append(piece)
+    length += len(piece)
+    if length > size:
+      return "".join(pieces)[:size] + "..."
+  return "".join(pieces)
+
+class _Repr:
+  '''
+  Formats as the given string with %r.
+  '''
+  
+  def __init__(self, text):
+    self.text = text
+  
+  def __repr__(self):
+    return self.text
+
+class ValidationError(ValueError):
+  '''
+  Raised when a json document is not valid against a schema.
+  
+  ``keyword`` is the schema property that failed, ``path`` the list of
+  field names leading from the document to the invalid field, ``value``
+  the invalid value and ``limit`` the value of the schema property. Errors
+  raised for the items of an array keep the error of the item as
+  ``cause``.
+  
+  The message is formatted from ``template`` and ``arguments`` the first
+  time it is used. Arguments formatted with %r are cut off after
+  ``maxrepr`` characters, which can be changed on the class or on a
+  subclass. None turns the limit off.
+  '''
+  
+  maxrepr = 200
+  
+  def __init__(self, template, arguments=(), keyword=None, fieldname=None,
+               value=None, limit=None, cause=None):
+    ValueError.__init__(self)
+    self.template = template
+    self.arguments = arguments
+    self.keyword = keyword
+    if fieldname is None:
+      self.path = []
+    else:
+      self.path = [fieldname]
+    self.value = value
+    self.limit = limit
+    self.cause = cause
+    self._message = None
+  
+  def _get_message(self):
+    if self._message is None:
+      self._message = self._format()
+    return self._message
+  message = property(_get_message)
+  
+  def _get_args(self):
+    return (self.message,)
+  args = property(_get_args)
+  
+  def _format(self):
+    if not self.arguments:
+      return self.template
+    # The messages of the errors in the cause chain are formatted first,
+    # innermost first, so that the errors of deeply nested items are
+    # formatted without recursion.
+    pending = []
+    error = self._unformatted_cause()
+    while error is not None:
+      pending.append(error)
+      error = error._unformatted_cause()
+    for error in reversed(pending):
+      error._message = error._format()
+    positions = _repr_positions(self.template)
+    arguments = []
+    for index, argument in enumerate(self.arguments):
+      if isinstance(argument, BaseException):
+        argument = argument.message
+      if index in positions:
+        argument = _Repr(bounded_repr(argument, self.maxrepr))
+      arguments.append(argument)
+    return self.template % tuple(arguments)
+  
+  def _unformatted_cause(self):
+    for argument in self.arguments:
+      if isinstance(argument, ValidationError) and argument._message is None:
+        return argument
+    return None
+  
+  def __str__(self):
+    return self.message
+  
+  def __unicode__(self):
+    return unicode(self.message)
+  
+  def __repr__(self):
+    return "%s(%r)" % (self.__class__.__name__, self.message)
+  
+  def __reduce__(self):
+    return (self.__class__, (self.template,), self.__dict__)
+
+class SchemaError(ValueError):
+  '''
+  Raised when a json-schema is not valid against the meta-schema.
+  ``errors`` is the list of (path, error) tuples of all of the errors
+  found in the schema. See jsonschema.metaschema.
+  '''
+  
+  def __init__(self, errors):
+    ValueError.__init__(self, "Schema is invalid: " +
+                        "; ".join(["%s: %s" % (path, error) for path, error in errors]))
+    self.errors = errors
+  
+  def __reduce__(self):
+    return (self.__class__, (self.errors,))
+
+__all__ = [ 'ValidationError', 'SchemaError', 'bounded_repr' ]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Checks json-schema objects against the meta-schema of the JSON Schema
+Proposal Second Draft.
+
+Schemas are checked once when they are compiled, so that the validation
+of each document does not need to check the schema again. All of the
+errors found in a schema are reported together by a single SchemaError.
+
+The validator does not support references, so the sub schemas found in
+"properties", "items", "additionalProperties" and the schema alternatives
+of "type" and "disallow" are checked by walking the schema rather than
+through "$ref" in the meta-schema. Schema properties whose validator
+method is overridden by the validator class are left to the validator.
+'''
+
+import types
+
+from jsonschema.errors import SchemaError
+
+# The schema properties of the second draft and the schemas their values
+# must match.
+METASCHEMA = {
+  "type": "object",
+  "properties": {
+    "type": {"type":["string", "array", "object"], "items":{"type":["string", "object"]}, "optional":True},
+    "properties": {"type":"object", "optional":True},
+    "items": {"type":["object", "array"], "optional":True},
+    "optional": {"type":"boolean", "optional":True},
+    "additionalProperties": {"type":["object", "boolean"], "optional":True},
+    "requires": {"type":["string", "object"], "optional":True},
+    "minimum": {"type":"number", "optional":True},
+    "maximum": {"type":"number", "optional":True},
+    "minItems": {"type":"integer", "minimum":0, "optional":True},
+    "maxItems": {"type":"integer", "minimum":0, "optional":True},
+    "pattern": {"type":"string", "optional":True},
+    "maxLength": {"type":"integer", "optional":True},
+    "minLength": {"type":"integer", "optional":True},
+    "enum": {"type":"array", "optional":True},
+    "title": {"type":"string", "optional":True},
+    "description": {"type":"string", "optional":True},
+    "format": {"type":"string", "optional":True},
+    "readonly": {"type":"boolean", "optional":True},
+    "transient": {"type":"boolean", "optional":True},
+    "hidden": {"type":"boolean", "optional":True},
+    "maxDecimal": {"type":"integer", "minimum":0, "optional":True},
+    "disallow": {"type":["string", "array", "object"], "items":{"type":["string", "object"]}, "optional":True},
+    "extends": {"type":["object", "array"], "optional":True},
+    # "$" is the id of the root schema.
+    "id": {"type":"string", "pattern":"^(?!\\$$)", "optional":True}
+  }
+}
+
+# The compiled schemas of the properties of the meta-schema.
+_metanodes = None
+
+def _meta_nodes():
+  global _metanodes
+  if _metanodes is None:
+    from jsonschema.compiler import SchemaCompiler
+    from jsonschema.validator import JSONSchemaValidator
+    compiler = SchemaCompiler(JSONSchemaValidator(False))
+    properties = METASCHEMA["properties"]
+    _metanodes = dict([(schemaprop, compiler.compile_node(properties[schemaprop]))
+                       for schemaprop in properties])
+  return _metanodes
+
+def schema_errors(schema, validator=None):
+  '''
+  Returns the errors of the given schema as a list of (path, error)
+  tuples, where ``path`` locates the schema object, such as
+  "$.properties.name", and ``error`` is the ValueError raised for it. An
+  empty list means the schema is valid.
+  
+  If a validator instance is given, schema properties whose validator
+  method it overrides are not checked.
+  '''
+  nodes = _meta_nodes()
+  errors = []
+  stack = [("$", schema)]
+  while stack:
+    path, each = stack.pop()
+    if each is None:
+      continue
+    if not type(each) == types.DictType:
+      errors.append((path, ValueError("Schema structure is invalid.")))
+      continue
+    
+    subschemas = []
+    for schemaprop in each:
+      node = nodes.get(schemaprop)
+      if node is None:
+        continue
+      if validator is not None and validator._is_overridden(schemaprop):
+        continue
+      try:
+        node(each, schemaprop)
+      except ValueError, e:
+        errors.append((path, e))
+        continue
+      
+      value = each[schemaprop]
+      if schemaprop == "properties":
+        subschemas.extend([("%s.properties.%s" % (path, name), value[name])
+                           for name in value])
+      elif schemaprop == "additionalProperties" and type(value) == types.DictType:
+        subschemas.append(("%s.additionalProperties" % path, value))
+      elif schemaprop in ("items", "type", "disallow"):
+        if type(value) == types.ListType:
+          # Type alternatives may also be type names.
+          subschemas.extend([("%s.%s[%d]" % (path, schemaprop, index), item)
+                             for index, item in enumerate(value)
+                             if schemaprop == "items" or type(item) == types.DictType])
+        elif type(value) == types.DictType:
+          subschemas.append(("%s.%s" % (path, schemaprop), value))
+    subschemas.reverse()
+    stack.extend(subschemas)
+  return errors
+
+def check_schema(schema, validator=None):
+  '''
+  Checks the given schema against the meta-schema and raises a
+  SchemaError listing all of its errors if it is not valid. See
+  schema_errors.
+  '''
+  errors = schema_errors(schema, validator)
+  if errors:
+    raise SchemaError(errors)
+
+__all__ = [ 'METASCHEMA', 'schema_errors', 'check_schema' ]
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Validation of many json documents with a pool of worker processes.
+
+Each worker process compiles its own copy of the schema when it starts.
+Newline delimited json files are split into byte ranges that start and end
+on line boundaries and the workers read and parse the lines of their range
+themselves, so the parent process never parses or pickles the documents.
+Only the errors of invalid documents are sent back to the parent.
+
+Documents validated by worker processes are copies of the original
+documents, so default values are not added to the caller's documents.
+'''
+
+import os
+from collections import deque
+
+import jsonschema
+
+# The compiled schema of a worker process.
+_compiled = None
+
+def _initialize(schema, validator_cls, interactive_mode):
+  global _compiled
+  # Compiled like the schemas of the calling process, so that documents
+  # valid there are valid in the workers too.
+  _compiled = jsonschema._prepare(schema, validator_cls, interactive_mode)
+
+def _validate_batch(args):
+  '''
+  Validates a list of documents in a worker process. Returns the number
+  of documents and the indexes and errors of the invalid documents.
+  '''
+  documents, columnar = args
+  failures = []
+  for index, ok, error in _compiled.validate_many(documents, columnar):
+    if not ok:
+      failures.append((index, error))
+  return (len(documents), failures)
+
+def _validate_range(args):
+  '''
+  Validates the lines of a byte range of a file in a worker process.
+  Returns the number of lines in the range and the line numbers, relative
+  to the start of the range, and errors of the invalid lines.
+  '''
+  from jsonschema.stream import validate_lines
+  path, start, end = args
+  infile = open(path, 'rb')
+  try:
+    infile.seek(start)
+    lines = _LineRange(infile, end)
+    failures = []
+    for lineno, ok, error in validate_lines(lines, _compiled):
+      if not ok:
+        failures.append((lineno, error))
+    return (lines.count, failures)
+  finally:
+    infile.close()
+
+class _LineRange:
+  '''
+  Iterates over the lines of a file from the current position up to the
+  given end position, counting the lines.
+  '''
+  
+  def __init__(self, infile, end):
+    self.infile = infile
+    self.position = infile.tell()
+    self.end = end
+    self.count = 0
+  
+  def __iter__(self):
+    return self
+  
+  def next(self):
+    if self.position >= self.end:
+      raise StopIteration
+    line = self.infile.readline()
+    if not line:
+      raise StopIteration
+    self.position += len(line)
+    self.count += 1
+    return line
+
+def line_ranges(path, count):
+  '''
+  Splits the file at the given path into at most ``count`` byte ranges of
+  roughly equal size that start at the beginning of a line. Returns a list
+  of (start, end) tuples.
+  '''
+  size = os.path.getsize(path)
+  boundaries = [0]
+  infile = open(path, 'rb')
+  try:
+    for index in range(1, count):
+      position = size * index // count
+      if position <= boundaries[-1]:
+        continue
+      # Move to the start of the first line that begins at or after the
+      # position.
+      infile.seek(position - 1)
+      infile.readline()
+      position = infile.tell()
+      if boundaries[-1] < position < size:
+        boundaries.append(position)
+  finally:
+    infile.close()
+  boundaries.append(size)
+  return zip(boundaries[:-1], boundaries[1:])
+
+def _imap(pool, function, tasks, window):
+  '''
+  Applies the function to each task in the pool and yields the results in
+  order. Unlike Pool.imap, at most ``window`` tasks are taken from the
+  iterable of tasks before their results are consumed.
+  '''
+  pending = deque()
+  for task in tasks:
+    pending.append(pool.apply_async(function, (task,)))
+    if len(pending) >= window:
+      yield pending.popleft().get()
+  while pending:
+    yield pending.popleft().get()
+
+def _batches(documents, size):
+  batch = []
+  for data in documents:
+    batch.append(data)
+    if len(batch) == size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+def _pool(processes, schema, validator_cls, interactive_mode):
+  '''
+  Returns a pool of worker processes that have compiled the schema and
+  the number of processes in the pool.
+  '''
+  from multiprocessing import Pool, cpu_count
+  if processes is None:
+    processes = cpu_count()
+  pool = Pool(processes, _initialize, (schema, validator_cls, interactive_mode))
+  return pool, processes
+
+def validate_many(documents, schema, validator_cls=None, interactive_mode=True,
+                  processes=None, batchsize=1000, columnar=False):
+  '''
+  Validates each document of the iterable ``documents`` with a pool of
+  ``processes`` worker processes, or one per cpu if ``processes`` is None.
+  Documents are sent to the workers in batches of ``batchsize`` documents,
+  which the workers validate column by column if ``columnar`` is True.
+  
+  Yields an (index, ok, error) tuple for each document in order, like
+  jsonschema.validate_many.
+  '''
+  pool, processes = _pool(processes, schema, validator_cls, interactive_mode)
+  try:
+    offset = 0
+    batches = ((batch, columnar) for batch in _batches(documents, batchsize))
+    for count, failures in _imap(pool, _validate_batch, batches, processes * 2):
+      failures = dict(failures)
+      for index in range(count):
+        error = failures.get(index)
+        yield (offset + index, error is None, error)
+      offset += count
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
+
+def validate_file(path, schema, validator_cls=None, interactive_mode=True,
+                  processes=None, chunksize=16*1024*1024):
+  '''
+  Validates each line of the newline delimited json file at the given path
+  with a pool of ``processes`` worker processes, or one per cpu if
+  ``processes`` is None. The file is split into ranges of about
+  ``chunksize`` bytes that are read by the workers.
+  
+  Yields a ``(lineno, error)`` tuple for each invalid line in order. Valid
+  lines are not reported.
+  '''
+  pool, processes = _pool(processes, schema, validator_cls, interactive_mode)
+  try:
+    count = max(processes * 4, os.path.getsize(path) // chunksize)
+    ranges = [(path, start, end) for start, end in line_ranges(path, count)]
+    offset = 0
+    for lines, failures in _imap(pool, _validate_range, ranges, processes * 2):
+      for lineno, error in failures:
+        yield (offset + lineno, error)
+      offset += lines
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
+
+__all__ = [ 'validate_many', 'validate_file', 'line_ranges' ]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Validation of json documents read from streams.
+
+Newline delimited json streams hold one json document per line. They are
+read and validated one line at a time so that streams of any size can be
+validated in constant memory.
+
+Documents that are a single large json array are read incrementally with
+iter_array. Each item of the array is parsed and validated against the
+"items" schema as soon as it is complete and is then discarded, so memory
+use is bounded by the size of the largest item rather than the size of
+the document.
+'''
+
+import re, types
+
+import simplejson
+
+import jsonschema
+from jsonschema.errors import ValidationError
+
+def validate_lines(infile, compiled, loads=simplejson.loads):
+  '''
+  Validates each line of the file-like object ``infile`` as a json
+  document against the CompiledSchema ``compiled``. Empty lines are
+  skipped.
+  
+  Yields a ``(lineno, ok, error)`` tuple for each document where
+  ``lineno`` is the line number starting at 1, ``ok`` is True if the
+  document is valid and ``error`` is the ValueError raised while parsing
+  or validating an invalid document.
+  '''
+  lineno = 0
+  for line in infile:
+    lineno += 1
+    if not line.strip():
+      continue
+    try:
+      data = loads(line)
+    except ValueError, e:
+      yield (lineno, False, e)
+      continue
+    try:
+      compiled.validate(data)
+    except ValueError, e:
+      yield (lineno, False, e)
+    else:
+      yield (lineno, True, None)
+
+# Tokens that change the structure of a json document outside of strings.
+_structure = re.compile(r'["\[\]{},]')
+# Tokens that end or escape characters in a json string.
+_stringtoken = re.compile(r'["\\]')
+_whitespace = re.compile(r'\s*')
+
+class ArrayScanner:
+  '''
+  Splits a json array read from a file-like object into the source text
+  of its items without parsing them. Only the text of the item being
+  scanned is kept in memory.
+  '''
+  
+  def __init__(self, infile, chunksize=65536):
+    self.infile = infile
+    self.chunksize = chunksize
+    self.buffer = ""
+    self.eof = False
+  
+  def read(self):
+    '''
+    Reads the next chunk into the buffer. Returns False at the end of the
+    file.
+    '''
+    if self.eof:
+      return False
+    chunk = self.infile.read(self.chunksize)
+    if not chunk:
+      self.eof = True
+      return False
+    self.buffer += chunk
+    return True
+  
+  def start(self):
+    '''
+    Skips leading whitespace. Returns True if the document is an array,
+    consuming its opening bracket.
+    '''
+    while True:
+      position = _whitespace.match(self.buffer).end()
+      if position < len(self.buffer) or not self.read():
+        break
+    self.buffer = self.buffer[position:]
+    if self.buffer.startswith("["):
+      self.buffer = self.buffer[1:]
+      return True
+    return False
+  
+  def rest(self):
+    '''
+    Returns the rest of the document.
+    '''
+    chunks = [self.buffer]
+    self.buffer = ""
+    while self.read():
+      chunks.append(self.buffer)
+      self.buffer = ""
+    self.buffer = "".join(chunks)
+    return self.buffer
+  
+  def items(self):
+    '''
+    Yields the source text of each item of the array.
+    '''
+    start = position = depth = 0
+    instring = False
+    count = 0
+    # The text of the item being scanned read with the previous chunks.
+    # Chunks are joined once the item is complete, so that long items are
+    # not copied again for each chunk.
+    held = []
+    while True:
+      if instring:
+        match = _stringtoken.search(self.buffer, position)
+      else:
+        match = _structure.search(self.buffer, position)
+      if match is None:
+        # Drop the text of the items that have been scanned already.
+        held.append(self.buffer[start:])
+        position -= len(self.buffer)
+        start = 0
+        self.buffer = ""
+        if not self.read():
+          raise ValueError("Unterminated array")
+        continue
+      
+      token = match.group()
+      position = match.end()
+      if instring:
+        if token == '"':
+          instring = False
+        else:
+          # Skip the escaped character
+          position += 1
+      elif token == '"':
+        instring = True
+      elif token in "[{":
+        depth += 1
+      elif depth > 0:
+        if token in "]}":
+          depth -= 1
+      elif token == "]":
+        text = "".join(held) + self.buffer[start:match.start()]
+        if text.strip():
+          yield text
+        elif count:
+          raise ValueError("Expecting array item before ']'")
+        self.buffer = self.buffer[position:]
+        break
+      elif token == ",":
+        text = "".join(held) + self.buffer[start:match.start()]
+        if not text.strip():
+          raise ValueError("Expecting array item before ','")
+        count += 1
+        held = []
+        yield text
+        start = position
+      else:
+        raise ValueError("Unexpected '%s' in array" % token)
+    
+    if self.rest().strip():
+      raise ValueError("Extra data after array")
+
+class _ArraySummary:
+  '''
+  Stands in for a streamed array in error messages.
+  '''
+  
+  def __init__(self, count):
+    self.count = count
+  
+  def __repr__(self):
+    return "<array of %d items>" % self.count
+
+# Schema properties of the array itself that are checked while the array
+# is streamed.
+_streamed = ("items", "minItems", "maxItems", "minimum", "maximum")
+
+# Schema properties that need the whole array in memory to be checked.
+_unsupported = ("enum", "maxDecimal", "identity", "uniqueItems")
+
+def _has_schema(fieldtype):
+  if type(fieldtype) == types.DictType:
+    return True
+  if type(fieldtype) == types.ListType:
+    for eachtype in fieldtype:
+      if _has_schema(eachtype):
+        return True
+  return False
+
+def iter_array(infile, schema, validator_cls=None, interactive_mode=True,
+               chunksize=65536, loads=simplejson.loads):
+  '''
+  Validates a json document read from the file-like object ``infile``
+  against the schema, yielding each item of the document as soon as it
+  has been validated. If the document is not an array it is read
+  completely and validated as a whole.
+  
+  The "items", "minItems", "maxItems", "minimum" and "maximum" properties
+  of the array schema are checked while the array is read, counting the
+  items. Other properties of the array schema are checked against an empty
+  array before the items are read. Properties that depend on the content
+  of the whole array, such as "enum" or type alternatives that are schema
+  objects, can't be checked while streaming and raise a ValueError.
+  
+  The array is represented as "<array of N items>" in error messages.
+  Tuple typed "items" schemas are checked item by item, so an item may be
+  reported as invalid before the length of the array is.
+  '''
+  scanner = ArrayScanner(infile, chunksize)
+  if not scanner.start():
+    data = loads(scanner.rest())
+    jsonschema.validate(data, schema, validator_cls, interactive_mode)
+    yield data
+    return
+  
+  if schema is None:
+    schema = {}
+  if not type(schema) == types.DictType:
+    raise ValueError("Schema structure is invalid.")
+  for schemaprop in _unsupported:
+    if schema.get(schemaprop) is not None:
+      raise ValueError("Schema property '%s' is not supported for streamed arrays" % schemaprop)
+  for schemaprop in ("type", "disallow"):
+    if _has_schema(schema.get(schemaprop)):
+      raise ValueError("Schema property '%s' is not supported for streamed arrays" % schemaprop)
+  
+  # Check the properties of the array that don't depend on its items.
+  shell = dict([(k, v) for k, v in schema.items() if k not in _streamed])
+  jsonschema.validate([], shell, validator_cls, interactive_mode)
+  
+  items = schema.get("items")
+  if items is None or type(items) == types.DictType:
+    itemschemas = None
+    if items is not None:
+      compiled = jsonschema.compile(items, validator_cls, interactive_mode)
+  elif type(items) == types.ListType:
+    itemschemas = [jsonschema.compile(eachItem, validator_cls, interactive_mode)
+                   for eachItem in items]
+  else:
+    raise ValueError("Properties definition of field '_data' is not a list or an object")
+  maxitems = schema.get("maxItems")
+  maximum = schema.get("maximum")
+  
+  count = 0
+  for text in scanner.items():
+    data = loads(text)
+    count += 1
+    if maxitems is not None and count > maxitems:
+      raise ValidationError("Value %r for field '%s' must have a maximum of %d items", (_ArraySummary(count), "_data", maxitems), "maxItems", "_data", _ArraySummary(count), maxitems)
+    if maximum is not None and count > maximum:
+      raise ValidationError("Value %r for field '%s' has more values than the maximum: %f", (_ArraySummary(count), "_data", maximum), "maximum", "_data", _ArraySummary(count), maximum)
+    if itemschemas is not None:
+      if count > len(itemschemas):
+        raise ValidationError("Length of list %r for field '%s' is not equal to length of schema list", (_ArraySummary(count), "_data"), "items", "_data", _ArraySummary(count), items)
+      compiled = itemschemas[count-1]
+    if items is not None:
+      try:
+        compiled.validate(data)
+      except ValueError, e:
+        raise ValidationError("Failed to validate field '%s' list schema: %r", ("_data", e), "items", "_data", _ArraySummary(count), items, e)
+    yield data
+  
+  if itemschemas is not None and count != len(itemschemas):
+    raise ValidationError("Length of list %r for field '%s' is not equal to length of schema list", (_ArraySummary(count), "_data"), "items", "_data", _ArraySummary(count), items)
+  minitems = schema.get("minItems")
+  if minitems is not None and count < minitems:
+    raise ValidationError("Value %r for field '%s' must have a minimum of %d items", ("_data", "_data", minitems), "minItems", "_data", _ArraySummary(count), minitems)
+  minimum = schema.get("minimum")
+  if minimum is not None and count < minimum:
+    raise ValidationError("Value %r for field '%s' has fewer values than the minimum: %f", (_ArraySummary(count), "_data", minimum), "minimum", "_data", _ArraySummary(count), minimum)
+
+def validate_array(infile, schema, validator_cls=None, interactive_mode=True,
+                   chunksize=65536):
+  '''
+  Validates a json document read from the file-like object ``infile``
+  against the schema without keeping the whole document in memory. See
+  iter_array.
+  '''
+  for data in iter_array(infile, schema, validator_cls, interactive_mode, chunksize):
+    pass
+
+__all__ = [ 'validate_lines', 'iter_array', 'validate_array', 'ArrayScanner' ]
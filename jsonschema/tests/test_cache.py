@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.cache import LRUCache, compile_pattern, compiled_schemas, \
+                             schema_objects, compiled_patterns
+
+class TestLRUCache(TestCase):
+
+  def test_get_put(self):
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    self.assertEqual(cache.get("a"), 1)
+    self.assertEqual(cache.get("c"), None)
+    self.assertEqual(cache.stats()["hits"], 1)
+    self.assertEqual(cache.stats()["misses"], 1)
+  
+  def test_eviction(self):
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    
+    # "b" was the least recently used entry
+    self.assertTrue("a" in cache)
+    self.assertTrue("b" not in cache)
+    self.assertTrue("c" in cache)
+    self.assertEqual(cache.stats()["evictions"], 1)
+    self.assertEqual(len(cache), 2)
+  
+  def test_resize(self):
+    cache = LRUCache(3)
+    for key in ["a", "b", "c"]:
+      cache.put(key, key)
+    cache.resize(1)
+    self.assertEqual(len(cache), 1)
+    self.assertTrue("c" in cache)
+    
+    cache.resize(0)
+    cache.put("d", "d")
+    self.assertEqual(len(cache), 0)
+
+class TestCompiledSchemaCache(TestCase):
+
+  def setUp(self):
+    compiled_schemas.clear()
+    schema_objects.clear()
+  
+  def tearDown(self):
+    compiled_schemas.clear()
+    schema_objects.clear()
+  
+  def test_validate_cached(self):
+    for x in range(10):
+      jsonschema.validate("test", {"type":"string", "maxLength":10})
+    stats = compiled_schemas.stats()
+    self.assertEqual(stats["misses"], 1)
+    self.assertEqual(stats["hits"], 9)
+  
+  def test_validate_cache_key(self):
+    jsonschema.validate("test", {"type":"string"})
+    jsonschema.validate("test", {"type":"string"}, interactive_mode=False)
+    jsonschema.validate(1, {"type":"integer"})
+    self.assertEqual(compiled_schemas.stats()["misses"], 3)
+  
+  def test_validate_same_object(self):
+    schema = {"type":"string", "enum":["v%d" % i for i in range(5000)]}
+    for x in range(10):
+      jsonschema.validate("v1", schema)
+    # The content key of the schema is only built the first time.
+    self.assertEqual(compiled_schemas.stats()["misses"], 1)
+    self.assertEqual(compiled_schemas.stats()["hits"], 0)
+    self.assertEqual(schema_objects.stats()["hits"], 9)
+  
+  def test_validate_changed_in_place(self):
+    schema = {"type":"string"}
+    jsonschema.validate("a", schema)
+    self.assertTrue(jsonschema.is_valid("a", schema))
+    schema["type"] = "integer"
+    self.assertRaises(ValueError, jsonschema.validate, "a", schema)
+    self.assertFalse(jsonschema.is_valid("a", schema))
+    jsonschema.validate(1, schema)
+    schema["type"] = "string"
+    jsonschema.validate("a", schema)
+    self.assertEqual(compiled_schemas.stats()["misses"], 2)
+  
+  def test_validate_deep(self):
+    # Documents nested deeper than the recursion limit are validated.
+    def nested(leaf):
+      node = leaf
+      for depth in range(2000):
+        node = {"type":"object", "properties":{"child":node}}
+      return node
+    data = "a"
+    for depth in range(2000):
+      data = {"child":data}
+    self.assertRaises(ValueError, jsonschema.validate, data, nested({"type":"integer"}))
+    self.assertFalse(jsonschema.is_valid(data, nested({"type":"integer"})))
+    jsonschema.validate(data, nested({"type":"string"}))
+  
+  def test_validate_unhashable(self):
+    class Unhashable:
+      __hash__ = None
+    jsonschema.validate(1, {"title":"test", "options":Unhashable()})
+    self.assertEqual(len(compiled_schemas), 0)
+
+class TestPatternCache(TestCase):
+  
+  def setUp(self):
+    compiled_patterns.clear()
+  
+  def tearDown(self):
+    compiled_patterns.clear()
+  
+  def test_compile_pattern(self):
+    regex = compile_pattern("^[a-z]+$")
+    self.assertTrue(compile_pattern("^[a-z]+$") is regex)
+    self.assertEqual(compiled_patterns.stats()["hits"], 1)
+  
+  def test_pattern_shared(self):
+    schema = {"type":"array", "items":{"type":"string", "pattern":"^[a-z]+$"}}
+    jsonschema.compile(schema).validate(["abc", "def", "ghi"])
+    jsonschema.compile({"pattern":"^[a-z]+$"}).validate("abc")
+    jsonschema.JSONSchemaValidator().validate(["abc", "def"], schema)
+    
+    stats = compiled_patterns.stats()
+    self.assertEqual(stats["misses"], 1)
+    self.assertEqual(stats["size"], 1)
+  
+  def test_invalid_pattern(self):
+    compiled = jsonschema.compile({"pattern":"("})
+    compiled.validate(1)
+    self.assertRaises(Exception, compiled.validate, "abc")
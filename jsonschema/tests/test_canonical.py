@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+from jsonschema.canonical import canonical, equality_key, ValueSet
+
+class TestCanonical(TestCase):
+
+  def test_member_order(self):
+    self.assertEqual(canonical({"a":1, "b":[1, {"c":None}]}),
+                     canonical({"b":[1, {"c":None}], "a":1}))
+  
+  def test_types(self):
+    self.assertNotEqual(canonical({"default":1}), canonical({"default":True}))
+    self.assertNotEqual(canonical({"default":1}), canonical({"default":1.0}))
+    self.assertNotEqual(canonical([1, 2]), canonical([2, 1]))
+
+class TestEqualityKey(TestCase):
+
+  def test_numbers(self):
+    self.assertEqual(equality_key(1), equality_key(1.0))
+    self.assertEqual(equality_key(1), equality_key(True))
+    self.assertEqual(equality_key(0.0), equality_key(False))
+    self.assertNotEqual(equality_key(1), equality_key(2))
+  
+  def test_containers(self):
+    self.assertEqual(equality_key({"a":[1, "b"]}), equality_key({"a":[1.0, u"b"]}))
+    self.assertNotEqual(equality_key([1, 2]), equality_key([2, 1]))
+    self.assertNotEqual(equality_key([1, 2]), equality_key((1, 2)))
+    self.assertNotEqual(equality_key({"a":1}), equality_key([["a", 1]]))
+    self.assertNotEqual(equality_key([]), equality_key({}))
+
+class TestValueSet(TestCase):
+
+  options = ["test", True, 123, 4.5, None, ["???"], {"a":[1, 2]}]
+  
+  def test_same_as_list(self):
+    valueset = ValueSet(self.options)
+    
+    for x in ["test", u"test", True, 1, 1.0, 123, 123.0, 4.5, None,
+              ["???"], [u"???"], {"a":[1, 2]}, {"a":[1.0, True + 1]},
+              "unknown", False, 0, 122, ["?"], [["???"]], {"a":[2, 1]},
+              {"a":[1, 2], "b":None}, (1, 2), set([1])]:
+      self.assertEqual(x in valueset, x in self.options, repr(x))
+  
+  def test_unhashable(self):
+    valueset = ValueSet([set([1]), "a"])
+    self.assertTrue(set([1]) in valueset)
+    self.assertTrue("a" in valueset)
+    self.assertFalse(set([2]) in valueset)
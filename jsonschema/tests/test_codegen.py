@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.validator import JSONSchemaValidator
+
+class TestCodegen(TestCase):
+
+  schema = {
+    "type": "object",
+    "properties": {
+      "name": {"type":"string", "maxLength":10, "pattern":"^[a-z ]+$"},
+      "kind": {"enum":["a", "b"]},
+      "tags": {"type":"array", "items":{"type":"string"}, "optional":True},
+      "size": {"type":["integer", "null"], "minimum":0, "maximum":10, "optional":True, "default":1},
+      "value": {"type":[{"type":"string"}, {"type":"number", "maxDecimal":2}], "optional":True}
+    },
+    "additionalProperties": {"type":"boolean"}
+  }
+  
+  passing = [
+    {"name":"test", "kind":"a"},
+    {"name":"test", "kind":"b", "tags":["a", "b"], "size":None},
+    {"name":"test", "kind":"b", "value":1.25, "flag":True},
+  ]
+  
+  failing = [
+    {}, {"name":1, "kind":"a"}, {"name":"TEST", "kind":"a"},
+    {"name":"test", "kind":"c"}, {"name":"test", "kind":"a", "tags":[1]},
+    {"name":"test", "kind":"a", "size":-1}, {"name":"test", "kind":"a", "size":11},
+    {"name":"test", "kind":"a", "value":1.255}, {"name":"test", "kind":"a", "flag":1},
+    None, "string"
+  ]
+  
+  def test_codegen_pass(self):
+    compiled = jsonschema.compile(self.schema, backend="codegen")
+    
+    for x in self.passing:
+      try:
+        compiled.validate(x)
+      except ValueError, e:
+        self.fail("Unexpected failure: %s" % e)
+  
+  def test_codegen_fail(self):
+    compiled = jsonschema.compile(self.schema, backend="codegen")
+    
+    for x in self.failing:
+      try:
+        compiled.validate(x)
+      except ValueError:
+        pass
+      else:
+        self.fail("Expected failure for %s" % repr(x))
+  
+  def test_codegen_same_errors(self):
+    compiled = jsonschema.compile(self.schema, backend="codegen")
+    
+    for x in self.failing:
+      try:
+        jsonschema.validate(x, self.schema)
+      except ValueError, e:
+        expected = str(e)
+      try:
+        compiled.validate(x)
+      except ValueError, e:
+        self.assertEqual(str(e), expected)
+  
+  def test_codegen_default(self):
+    compiled = jsonschema.compile(self.schema, backend="codegen")
+    data = {"name":"test", "kind":"a"}
+    compiled.validate(data)
+    self.assertEqual(data.get("size"), 1)
+    
+    compiled = jsonschema.compile(self.schema, interactive_mode=False, backend="codegen")
+    data = {"name":"test", "kind":"a"}
+    compiled.validate(data)
+    self.assertTrue("size" not in data)
+  
+  def test_codegen_source(self):
+    compiled = jsonschema.compile({"type":"string", "maxLength":10}, backend="codegen")
+    self.assertTrue(compiled.root.source.startswith("def validate(x, fieldname):"))
+  
+  def test_codegen_override(self):
+    class UpperValidator(JSONSchemaValidator):
+      def validate_type(self, x, fieldname, schema, fieldtype=None):
+        if fieldtype == "upper":
+          if not x.get(fieldname).isupper():
+            raise ValueError("Value for field '%s' is not upper case" % fieldname)
+        else:
+          JSONSchemaValidator.validate_type(self, x, fieldname, schema, fieldtype)
+    
+    compiled = jsonschema.compile({"items":{"type":"upper"}}, validator_cls=UpperValidator, backend="codegen")
+    compiled.validate(["UPPER"])
+    self.assertRaises(ValueError, compiled.validate, ["lower"])
+  
+  def test_codegen_deep(self):
+    # Deeply nested sub schemas are generated as functions of their own.
+    for schemaprop in ("items", "properties", "additionalProperties"):
+      schema = {"type":"integer"}
+      data, invalid = 1, "a"
+      for depth in range(120):
+        if schemaprop == "items":
+          schema = {"type":"array", "items":schema}
+          data, invalid = [data], [invalid]
+        elif schemaprop == "properties":
+          schema = {"type":"object", "properties":{"a":schema}}
+          data, invalid = {"a":data}, {"a":invalid}
+        else:
+          schema = {"type":"object", "additionalProperties":schema}
+          data, invalid = {"b":data}, {"b":invalid}
+      compiled = jsonschema.compile(schema, backend="codegen")
+      compiled.validate(data)
+      self.assertTrue(compiled.is_valid(data))
+      self.assertRaises(ValueError, compiled.validate, invalid)
+      self.assertFalse(compiled.is_valid(invalid))
+  
+  def test_codegen_unknown_backend(self):
+    self.assertRaises(ValueError, jsonschema.compile, {}, backend="unknown")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema import columnar
+
+class TestColumnar(TestCase):
+  
+  schema = {
+    "type": "object",
+    "properties": {
+      "id": {"type":"integer", "minimum":0},
+      "name": {"type":"string", "minLength":1, "maxLength":5, "pattern":"^[a-z]+$"},
+      "kind": {"enum":["a", "b"], "optional":True},
+      "code": {"type":"string", "minLength":2, "optional":True},
+      "amount": {"type":"number", "maxDecimal":2, "optional":True},
+      "size": {"type":["number", "null"], "maximum":10, "optional":True},
+      "price": {"type":"number", "maxDecimal":2, "requires":"size", "optional":True}
+    },
+    "additionalProperties": False
+  }
+  
+  valid = [
+    {"id":0, "name":"a", "amount":12},
+    {"id":1, "name":"abc", "kind":"b", "size":None, "code":"xy"},
+    {"id":2, "name":"abcde", "size":float("nan"), "price":1.5},
+    {"id":3, "name":"b", "kind":None, "size":-1e10, "amount":0.29},
+  ]
+  
+  invalid = [
+    None, "a", [], {}, {"name":"a"}, {"id":-1, "name":"a"}, {"id":1.0, "name":"a"},
+    {"id":True, "name":"a"}, {"id":0, "name":""}, {"id":0, "name":"abcdef"},
+    {"id":0, "name":"ABC"}, {"id":0, "name":u"é"}, {"id":0, "name":1},
+    {"id":0, "name":"a", "kind":"c"}, {"id":0, "name":"a", "kind":1},
+    {"id":0, "name":"a", "size":11}, {"id":0, "name":"a", "size":[1]},
+    {"id":0, "name":"a", "price":1}, {"id":0, "name":"a", "size":1, "price":1.255},
+    {"id":0, "name":"a", "code":"x"}, {"id":0, "name":"a", "amount":1.255}, {"id":0, "name":"a", "other":1}
+  ]
+  
+  def _results(self, documents, use_columns):
+    compiled = jsonschema.compile(self.schema)
+    return [(index, ok, error and str(error))
+            for index, ok, error in compiled.validate_many(documents, use_columns)]
+  
+  def test_same_results(self):
+    batchsize = columnar.BATCH_SIZE
+    columnar.BATCH_SIZE = 7
+    try:
+      for invalid in self.invalid:
+        for position in (0, 3, 13):
+          documents = self.valid * 4
+          documents.insert(position, invalid)
+          self.assertEqual(self._results(documents, True),
+                           self._results(documents, False), repr(invalid))
+      documents = self.valid * 5 + self.invalid
+      self.assertEqual(self._results(documents, True),
+                       self._results(documents, False))
+    finally:
+      columnar.BATCH_SIZE = batchsize
+  
+  def test_nan_first(self):
+    schema = {"properties":{"a":{"minimum":0, "maximum":1}}}
+    compiled = jsonschema.compile(schema)
+    self.assertNotEqual(compiled.columns, None)
+    results = list(compiled.validate_many([{"a":float("nan")}, {"a":2}, {"a":-1}], True))
+    self.assertEqual([ok for index, ok, error in results], [True, False, False])
+  
+  def test_plan(self):
+    compiled = jsonschema.compile(self.schema)
+    self.assertNotEqual(compiled.columns, None)
+    fields = dict([(name, checks) for name, node, checks in compiled.columns.fields])
+    self.assertEqual(len(fields["name"]), 5)
+    self.assertEqual(len(fields["code"]), 2)
+    self.assertEqual(len(fields["amount"]), 2)
+    self.assertEqual(fields["price"], None)
+    # Documents that can be changed by defaults are validated one by one.
+    schema = {"properties":{"a":{"type":"integer", "default":1, "optional":True}}}
+    self.assertEqual(jsonschema.compile(schema).columns, None)
+    self.assertEqual(jsonschema.compile({"type":"array", "properties":{}}).columns, None)
+    self.assertEqual(jsonschema.compile({"type":"string"}).columns, None)
+  
+  def test_validate_many(self):
+    documents = self.valid + self.invalid
+    results = [(index, ok, error and str(error)) for index, ok, error
+               in jsonschema.validate_many(documents, self.schema, columnar=True)]
+    expected = [(index, ok, error and str(error)) for index, ok, error
+                in jsonschema.validate_many(documents, self.schema)]
+    self.assertEqual(results, expected)
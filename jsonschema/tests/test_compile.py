@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.validator import JSONSchemaValidator
+
+class TestCompile(TestCase):
+
+  schema = {
+    "type": "object",
+    "properties": {
+      "name": {"type":"string", "maxLength":10},
+      "tags": {"type":"array", "items":{"type":"string"}, "optional":True},
+      "size": {"type":["integer", "null"], "minimum":0, "optional":True, "default":1}
+    },
+    "additionalProperties": False
+  }
+  
+  def test_compile_pass(self):
+    compiled = jsonschema.compile(self.schema)
+    
+    for x in [{"name":"test"}, {"name":"test", "tags":["a", "b"], "size":None}]:
+      try:
+        compiled.validate(x)
+      except ValueError, e:
+        self.fail("Unexpected failure: %s" % e)
+  
+  def test_compile_fail(self):
+    compiled = jsonschema.compile(self.schema)
+    
+    for x in [{}, {"name":1}, {"name":"test", "tags":[1]},
+              {"name":"test", "size":-1}, {"name":"test", "other":1}, None]:
+      try:
+        compiled.validate(x)
+      except ValueError:
+        pass
+      else:
+        self.fail("Expected failure for %s" % repr(x))
+  
+  def test_compile_same_errors(self):
+    compiled = jsonschema.compile(self.schema)
+    
+    for x in [{"name":"a very long name"}, {"name":"test", "tags":[1]}]:
+      try:
+        jsonschema.validate(x, self.schema)
+      except ValueError, e:
+        expected = str(e)
+      try:
+        compiled.validate(x)
+      except ValueError, e:
+        self.assertEqual(str(e), expected)
+      else:
+        self.fail("Expected failure for %s" % repr(x))
+  
+  def test_compile_default(self):
+    compiled = jsonschema.compile(self.schema)
+    data = {"name":"test"}
+    compiled.validate(data)
+    self.assertEqual(data.get("size"), 1)
+    
+    compiled = jsonschema.compile(self.schema, interactive_mode=False)
+    data = {"name":"test"}
+    compiled.validate(data)
+    self.assertTrue("size" not in data)
+  
+  def test_compile_keywords(self):
+    compiled = jsonschema.compile({"type":"string", "maxLength":10})
+    keywords = compiled.root.keywords[:]
+    keywords.sort()
+    self.assertEqual(keywords, ["maxLength", "optional", "type"])
+  
+  def test_compile_override(self):
+    class UpperValidator(JSONSchemaValidator):
+      def validate_type(self, x, fieldname, schema, fieldtype=None):
+        if fieldtype == "upper":
+          if not x.get(fieldname).isupper():
+            raise ValueError("Value for field '%s' is not upper case" % fieldname)
+        else:
+          JSONSchemaValidator.validate_type(self, x, fieldname, schema, fieldtype)
+    
+    compiled = jsonschema.compile({"type":"upper"}, validator_cls=UpperValidator)
+    compiled.validate("UPPER")
+    self.assertRaises(ValueError, compiled.validate, "lower")
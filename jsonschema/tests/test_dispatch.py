@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.validator import JSONSchemaValidator
+
+class ClassValidator(JSONSchemaValidator):
+  '''
+  Adds a "class" schema property like examples/sample_override.py and
+  counts the calls of an overridden no-op validator.
+  '''
+  
+  calls = 0
+  
+  def validate_class(self, x, fieldname, schema, classname=None):
+    if classname is not None and not self._is_string_type(classname):
+      raise ValueError("The classname %r must be a string" % classname)
+    return x
+  
+  def validate_hidden(self, x, fieldname, schema, hidden=False):
+    ClassValidator.calls += 1
+    return x
+
+class TestDispatch(TestCase):
+  
+  def test_present_keywords(self):
+    validator = JSONSchemaValidator()
+    self.assertEqual(validator._schema_keywords({"type":"string"}), ("type", "optional"))
+    self.assertEqual(validator._schema_keywords({"maxLength":1, "type":"string"}),
+                     validator._schema_keywords({"type":"string", "maxLength":1}))
+    self.assertEqual(validator._schema_keywords({"unknown":1}), ("optional",))
+  
+  def test_extension(self):
+    schema = {"type":"object", "class":1}
+    self.assertRaises(ValueError, ClassValidator().validate, {}, schema)
+    self.assertRaises(ValueError, jsonschema.compile(schema, ClassValidator).validate, {})
+    ClassValidator().validate({}, {"type":"object", "class":"test"})
+  
+  def test_extension_order(self):
+    keywords = ClassValidator()._schema_keywords({"class":"test", "type":"object"})
+    self.assertEqual(keywords[-1], "class")
+    self.assertTrue("type" in keywords)
+  
+  def test_overridden_absent(self):
+    # Overridden validators run even if the property is missing.
+    ClassValidator.calls = 0
+    ClassValidator().validate({}, {"type":"object"})
+    self.assertEqual(ClassValidator.calls, 1)
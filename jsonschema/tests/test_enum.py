@@ -31,4 +31,28 @@ class TestEnum(TestCase):
     except ValueError:
       pass
     else:
-      self.fail("Expected failure for %s" % repr(x))
\ No newline at end of file
+      self.fail("Expected failure for %s" % repr(x))
+  
+  def test_enum_compiled(self):
+    compiled = jsonschema.compile(self.schema)
+    
+    for x in ["test", True, 123, ["???"], 1, 1.0, 123.0]:
+      try:
+        compiled.validate(x)
+      except ValueError, e:
+        self.fail("Unexpected failure: %s" % e)
+    
+    for x in ["unknown", False, 0, 124, ["?"], {"test":True}]:
+      try:
+        compiled.validate(x)
+      except ValueError:
+        pass
+      else:
+        self.fail("Expected failure for %s" % repr(x))
+  
+  def test_enum_objects(self):
+    schema = {"enum":[{"code":"JP", "names":["Japan"]}, {"code":"US"}]}
+    compiled = jsonschema.compile(schema)
+    compiled.validate({"names":["Japan"], "code":"JP"})
+    self.assertRaises(ValueError, compiled.validate, {"code":"JP"})
+    self.assertRaises(ValueError, compiled.validate, {"code":"US", "names":[]})
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+import pickle
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.errors import ValidationError, bounded_repr
+
+class TestBoundedRepr(TestCase):
+
+  def test_short_values(self):
+    for value in [1, 1.5, None, True, "abc", u"abc", [], {}, [1, [2, {"a":[None]}]],
+                  {"b":1, "a":[1, 2]}]:
+      self.assertEqual(bounded_repr(value, 50), repr(value))
+  
+  def test_long_values(self):
+    self.assertEqual(bounded_repr(range(1000000), 10), "[0, 1, 2, ...")
+    self.assertEqual(bounded_repr("x" * 1000000, 5), "'xxxx...")
+    self.assertEqual(bounded_repr({"a":range(100)}, 12), "{'a': [0, 1,...")
+  
+  def test_deep_values(self):
+    value = []
+    for x in range(10000):
+      value = [value]
+    self.assertEqual(bounded_repr(value, 5), "[[[[[...")
+
+class TestValidationError(TestCase):
+
+  def test_attributes(self):
+    schema = {"properties":{"a":{"properties":{"b":{"maximum":3}}}}}
+    for backend in ("tree", "codegen"):
+      compiled = jsonschema.compile(schema, backend=backend)
+      try:
+        compiled.validate({"a":{"b":5}})
+      except ValidationError, e:
+        self.assertEqual(e.keyword, "maximum")
+        self.assertEqual(e.path, ["_data", "a", "b"])
+        self.assertEqual(e.value, 5)
+        self.assertEqual(e.limit, 3)
+        self.assertEqual(e.message, "Value 5 for field 'b' is greater than maximum value: 3.000000")
+      else:
+        self.fail("Expected failure")
+  
+  def test_items_cause(self):
+    try:
+      jsonschema.validate(["a", 1], {"items":{"type":"string"}})
+    except ValidationError, e:
+      self.assertEqual(e.keyword, "items")
+      self.assertEqual(e.cause.keyword, "type")
+      self.assertEqual(str(e), "Failed to validate field '_data' list schema: \"Value 1 for field '_data' is not of type 'string'\"")
+    else:
+      self.fail("Expected failure")
+  
+  def test_deep_cause(self):
+    schema = {"type":"string"}
+    data = 1
+    for depth in range(50):
+      schema = {"type":"array", "items":schema}
+      data = [data]
+    try:
+      jsonschema.validate(data, schema)
+    except ValidationError, e:
+      self.assertTrue(len(str(e)) < ValidationError.maxrepr + 100)
+      self.assertTrue(str(e).startswith("Failed to validate field '_data' list schema: "))
+    else:
+      self.fail("Expected failure")
+    
+    # Cause chains longer than the recursion limit are formatted too.
+    e = ValidationError("Value %r for field '%s' is not of type %r", (1, "_data", "string"))
+    for depth in range(10000):
+      e = ValidationError("Failed to validate field '%s' list schema: %r", ("_data", e),
+                          "items", "_data", [], None, e)
+    self.assertTrue(len(str(e)) < ValidationError.maxrepr + 100)
+  
+  def test_truncated_message(self):
+    data = range(1000000)
+    try:
+      jsonschema.validate(data, {"maxItems":10})
+    except ValueError, e:
+      self.assertTrue(e.value is data)
+      self.assertTrue(len(str(e)) < ValidationError.maxrepr + 100)
+      self.assertTrue(str(e).startswith("Value [0, 1, 2,"))
+    else:
+      self.fail("Expected failure")
+  
+  def test_maxrepr(self):
+    class ShortError(ValidationError):
+      maxrepr = 5
+    e = ShortError("Value %r for field '%s' is not of type %r", ([1, 2, 3], "_data", "string"))
+    self.assertEqual(str(e), "Value [1, 2... for field '_data' is not of type 'stri...")
+  
+  def test_lazy_message(self):
+    e = ValidationError("Value %r for field '%s' is not of type %r", (1, "_data", "string"))
+    self.assertEqual(e._message, None)
+    self.assertEqual(e.args, ("Value 1 for field '_data' is not of type 'string'",))
+  
+  def test_pickle(self):
+    e = ValidationError("Value %r for field '%s' is not of type %r", (1, "_data", "string"),
+                        "type", "_data", 1, "string")
+    copy = pickle.loads(pickle.dumps(e, 2))
+    self.assertEqual(str(copy), str(e))
+    self.assertEqual(copy.keyword, "type")
+    self.assertEqual(copy.path, ["_data"])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.canonical import first_duplicate
+
+class TestIdentity(TestCase):
+
+  backends = ("tree", "codegen", "stack")
+  
+  def test_identity_pass(self):
+    schema = {"identity":True}
+    for x in [[], [1, 2, "1"], [[1, 2], [2, 1]], [{"a":1}, {"a":1, "b":2}], "abc", None,
+              [1, True], [0, False, None], [[1], [True]], [{"a":0}, {"a":False}]]:
+      try:
+        jsonschema.validate(x, schema)
+      except ValueError, e:
+        self.fail("Unexpected failure: %s" % e)
+      for backend in self.backends:
+        compiled = jsonschema.compile(schema, backend=backend)
+        try:
+          compiled.validate(x)
+        except ValueError, e:
+          self.fail("Unexpected failure: %s" % e)
+  
+  def test_identity_fail(self):
+    schema = {"type":"array", "identity":True}
+    for x in [[1, 1.0], [True, True], ["a", u"a"], [[1, [2]], [1.0, [2]]],
+              [{"a":1, "b":[2]}, {"b":[2], "a":1}]]:
+      self.assertRaises(ValueError, jsonschema.validate, x, schema)
+      for backend in self.backends:
+        compiled = jsonschema.compile(schema, backend=backend)
+        self.assertRaises(ValueError, compiled.validate, x)
+        self.assertFalse(compiled.is_valid(x))
+  
+  def test_identity_false(self):
+    for schema in [{"identity":False}, {"uniqueItems":False}]:
+      jsonschema.validate([1, 1], schema)
+      for backend in self.backends:
+        jsonschema.compile(schema, backend=backend).validate([1, 1])
+  
+  def test_uniqueItems(self):
+    schema = {"properties":{"tags":{"type":"array", "uniqueItems":True}}}
+    jsonschema.validate({"tags":["a", "b"]}, schema)
+    for backend in self.backends:
+      compiled = jsonschema.compile(schema, backend=backend)
+      try:
+        compiled.validate({"tags":["a", "b", "c", "b", "a"]})
+      except jsonschema.ValidationError, e:
+        self.assertEqual(e.keyword, "uniqueItems")
+        self.assertEqual(e.path, ["_data", "tags"])
+        self.assertTrue("indexes 1 and 3" in e.message)
+      else:
+        self.fail("Expected failure")
+  
+  def test_first_duplicate(self):
+    self.assertEqual(first_duplicate([]), None)
+    self.assertEqual(first_duplicate([3, 1, 2, 1, 3]), (1, 3))
+    self.assertEqual(first_duplicate([{"a":[1]}, {"a":[2]}, {"a":[1.0]}]), (0, 2))
+    self.assertEqual(first_duplicate([None, False, 0]), None)
+    self.assertEqual(first_duplicate([0, False, 0.0]), (0, 2))
+    self.assertEqual(first_duplicate([[1, True], [1.0, 1], [1, True]]), (0, 2))
+    # Values that can't be hashed are compared one by one.
+    self.assertEqual(first_duplicate([set([1]), 2, 2.0, set([1])]), (1, 2))
+    self.assertEqual(first_duplicate([set([1]), 2, set([1])]), (0, 2))
+  
+  def test_long_list(self):
+    x = [{"id":index, "tags":["item", index]} for index in xrange(100000)]
+    compiled = jsonschema.compile({"type":"array", "uniqueItems":True})
+    compiled.validate(x)
+    x.append({"tags":["item", 5000.0], "id":5000})
+    try:
+      compiled.validate(x)
+    except ValueError, e:
+      self.assertTrue("indexes 5000 and 100000" in e.message)
+    else:
+      self.fail("Expected failure")
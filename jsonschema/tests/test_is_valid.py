@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+import sys
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.validator import JSONSchemaValidator
+
+class TestIsValid(TestCase):
+
+  schema = {
+    "type": "object",
+    "properties": {
+      "name": {"type":"string", "minLength":1, "maxLength":10, "pattern":"^[a-z]+$"},
+      "kind": {"enum":["a", "b"], "requires":"name"},
+      "tags": {"type":"array", "items":{"type":"string"}, "maxItems":2, "optional":True},
+      "pair": {"type":"array", "items":[{"type":"integer"}, {"type":"string"}], "optional":True},
+      "size": {"type":["integer", "null"], "minimum":0, "maximum":10, "optional":True, "default":1},
+      "value": {"type":[{"type":"string"}, {"type":"number", "maxDecimal":2}], "optional":True}
+    },
+    "additionalProperties": {"type":"boolean"}
+  }
+  
+  passing = [
+    {"name":"test", "kind":"a"},
+    {"name":"test", "kind":"b", "tags":["a", "b"], "size":None},
+    {"name":"test", "kind":"b", "value":1.25, "flag":True},
+    {"name":"test", "kind":"a", "pair":[1, "a"], "value":"abc"},
+  ]
+  
+  failing = [
+    {}, {"name":1, "kind":"a"}, {"name":"TEST", "kind":"a"}, {"name":"", "kind":"a"},
+    {"name":"test", "kind":"c"}, {"name":"test", "kind":"a", "tags":[1]},
+    {"name":"test", "kind":"a", "tags":["a", "b", "c"]},
+    {"name":"test", "kind":"a", "pair":[1, 2]}, {"name":"test", "kind":"a", "pair":[1]},
+    {"name":"test", "kind":"a", "size":-1}, {"name":"test", "kind":"a", "size":11},
+    {"name":"test", "kind":"a", "value":1.255}, {"name":"test", "kind":"a", "value":[]},
+    {"name":"test", "kind":"a", "flag":1}, None, "string"
+  ]
+  
+  def test_is_valid(self):
+    for backend in ("tree", "codegen"):
+      compiled = jsonschema.compile(self.schema, backend=backend)
+      for x in self.passing:
+        self.assertTrue(compiled.is_valid(x), "%s: %r" % (backend, x))
+      for x in self.failing:
+        self.assertFalse(compiled.is_valid(x), "%s: %r" % (backend, x))
+  
+  def test_is_valid_matches_validate(self):
+    for x in self.passing + self.failing:
+      try:
+        jsonschema.validate(x, self.schema)
+      except ValueError:
+        expected = False
+      else:
+        expected = True
+      self.assertEqual(jsonschema.is_valid(x, self.schema), expected)
+  
+  def test_is_valid_disallow(self):
+    schema = {"disallow":["string", {"type":"object", "properties":{"a":{"type":"integer"}}}]}
+    for backend in ("tree", "codegen"):
+      compiled = jsonschema.compile(schema, backend=backend)
+      self.assertTrue(compiled.is_valid(1))
+      self.assertTrue(compiled.is_valid({"a":"b"}))
+      self.assertFalse(compiled.is_valid("a"))
+      self.assertFalse(compiled.is_valid({"a":1}))
+  
+  def test_is_valid_default(self):
+    data = {"name":"test", "kind":"a"}
+    self.assertTrue(jsonschema.is_valid(data, self.schema))
+    self.assertEqual(data.get("size"), 1)
+    
+    data = {"name":"test", "kind":"a"}
+    self.assertTrue(jsonschema.is_valid(data, self.schema, interactive_mode=False))
+    self.assertTrue("size" not in data)
+  
+  def test_is_valid_override(self):
+    class UpperValidator(JSONSchemaValidator):
+      def validate_type(self, x, fieldname, schema, fieldtype=None):
+        if fieldtype == "upper":
+          if not x.get(fieldname).isupper():
+            raise ValueError("Value for field '%s' is not upper case" % fieldname)
+        else:
+          JSONSchemaValidator.validate_type(self, x, fieldname, schema, fieldtype)
+    
+    schema = {"items":{"type":"upper"}}
+    for backend in ("tree", "codegen"):
+      compiled = jsonschema.compile(schema, validator_cls=UpperValidator, backend=backend)
+      self.assertTrue(compiled.is_valid(["UPPER"]))
+      self.assertFalse(compiled.is_valid(["lower"]))
+  
+  def test_is_valid_no_errors(self):
+    # Rejecting a document does not raise any exception, not even one that
+    # is caught again, which is seen by tracing exception events.
+    events = []
+    def trace(frame, event, arg):
+      if event == "exception":
+        events.append(arg[0])
+      return trace
+    
+    union = {"type":[{"type":"object", "properties":{"kind":{"enum":["a"]}}},
+                     {"type":"object", "properties":{"kind":{"enum":["b"]}, "x":{"type":"integer"}}}]}
+    cases = [(self.schema, self.failing), (union, [{}, {"x":1}, {"kind":"c"}, {"kind":"b"}])]
+    for schema, failing in cases:
+      for backend in ("tree", "codegen"):
+        compiled = jsonschema.compile(schema, backend=backend)
+        sys.settrace(trace)
+        try:
+          for x in failing:
+            compiled.is_valid(x)
+        finally:
+          sys.settrace(None)
+        self.assertEqual(events, [])
@@ -70,4 +70,29 @@ class TestItems(TestCase):
     except ValueError:
       pass
     else:
-      self.fail("Expected failure for %s" % repr(x))
\ No newline at end of file
+      self.fail("Expected failure for %s" % repr(x))
+  
+  def test_items_context(self):
+    # The items of a list are validated in the context of the document.
+    schema = {"id":"list", "items":[{"id":"first"}, {"type":"string"}]}
+    validator = jsonschema.JSONSchemaValidator()
+    validator.validate([1, "a"], schema)
+    compiled = jsonschema.compile(schema)
+    compiled.validate([1, "a"])
+    
+    for refmap in (validator._refmap, compiled.validator._refmap):
+      self.assertTrue(refmap["$"] is schema)
+      self.assertEqual(sorted(refmap.keys()), ["$", "first", "list"])
+  
+  def test_items_nested(self):
+    schema = {"items":{"items":{"type":"integer", "default":0}}}
+    for backend in ("tree", "codegen"):
+      compiled = jsonschema.compile(schema, backend=backend)
+      compiled.validate([[1, 2], [], [3]])
+      self.assertFalse(compiled.is_valid([[1], [2, "a"]]))
+      try:
+        compiled.validate([[1], [2, "a"]])
+      except ValueError, e:
+        self.assertEqual(e.cause.cause.value, "a")
+      else:
+        self.fail("Expected failure")
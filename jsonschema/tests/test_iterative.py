@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.iterative import StackCompiler, StackNode
+from jsonschema.validator import JSONSchemaValidator
+
+class TestIterative(TestCase):
+  
+  def _stack(self, schema, shallow=StackCompiler.shallow):
+    compiler = StackCompiler(JSONSchemaValidator(True))
+    compiler.shallow = shallow
+    return compiler.compile(schema)
+  
+  def test_deep_properties(self):
+    schema = node = {"type":"object"}
+    data = x = {}
+    for level in range(10000):
+      node["properties"] = {"child":{"type":"object", "optional":True},
+                            "value":{"type":"integer", "optional":True}}
+      node = node["properties"]["child"]
+      x["child"] = {"value":level}
+      x = x["child"]
+      if level == 5000:
+        middle = x
+    compiled = jsonschema.compile(schema, backend="stack")
+    compiled.validate(data)
+    self.assertTrue(compiled.is_valid(data))
+    
+    middle["value"] = "a"
+    self.assertFalse(compiled.is_valid(data))
+    try:
+      compiled.validate(data)
+    except ValueError, e:
+      self.assertEqual(e.keyword, "type")
+      self.assertEqual(e.path, ["_data"] + ["child"] * 5001 + ["value"])
+    else:
+      self.fail("Expected a ValueError")
+  
+  def test_deep_items(self):
+    schema = node = {"type":"array"}
+    data = x = []
+    for level in range(10000):
+      node["items"] = {"type":"array"}
+      node = node["items"]
+      x.append([])
+      x = x[0]
+    node["items"] = {"type":"integer"}
+    compiled = jsonschema.compile(schema, backend="stack")
+    compiled.validate(data)
+    x.append(1)
+    compiled.validate(data)
+    
+    x[0] = "a"
+    self.assertFalse(compiled.is_valid(data))
+    try:
+      compiled.validate(data)
+    except ValueError, e:
+      # Each level of items wraps the error of the item.
+      depth = 0
+      while e.cause is not None:
+        self.assertEqual(e.keyword, "items")
+        e = e.cause
+        depth += 1
+      self.assertEqual(depth, 10001)
+      self.assertEqual(e.keyword, "type")
+    else:
+      self.fail("Expected a ValueError")
+  
+  def test_same_errors(self):
+    # With every schema object compiled into a StackNode the errors are
+    # the same as those of the tree backend.
+    schema = {
+      "type": "object",
+      "properties": {
+        "a": {"type":"object", "properties":{"b":{"type":"array", "items":{"type":"integer", "maximum":3}}}},
+        "c": {"type":"array", "items":[{"type":"string"}, {"type":{"type":"object"}}], "optional":True},
+        "d": {"type":"integer", "default":1, "optional":True}
+      },
+      "additionalProperties": {"type":"object", "properties":{"e":{"type":"string"}}}
+    }
+    documents = [
+      {"a":{"b":[1, 2]}},
+      {"a":{"b":[1, 4]}},
+      {"a":{"b":"x"}},
+      {"a":{}, "c":["x", {}]},
+      {"a":{"b":[]}, "c":["x", 1]},
+      {"a":{"b":[]}, "c":["x"]},
+      {"a":{"b":[]}, "f":{"e":"x"}},
+      {"a":{"b":[]}, "f":{"e":1}},
+      {"a":{"b":[]}, "f":1},
+    ]
+    tree = jsonschema.compile(schema)
+    stack = self._stack(schema, 0)
+    self.assertTrue(isinstance(stack.root, StackNode))
+    for document in documents:
+      errors = []
+      for compiled in (tree, stack):
+        data = dict(document)
+        try:
+          compiled.validate(data)
+        except ValueError, e:
+          errors.append((str(e), e.keyword, e.path, data))
+        else:
+          errors.append(data)
+      self.assertEqual(errors[0], errors[1], repr(document))
+      self.assertEqual(tree.is_valid(dict(document)), stack.is_valid(dict(document)))
+  
+  def test_shallow(self):
+    schema = {"properties":{"a":{"properties":{"b":{"properties":{}}}}}}
+    self.assertFalse(isinstance(self._stack(schema).root, StackNode))
+    self.assertTrue(isinstance(self._stack(schema, 1).root, StackNode))
+  
+  def test_override(self):
+    class CheckedValidator(JSONSchemaValidator):
+      def validate_properties(self, x, fieldname, schema, properties=None):
+        if x.get(fieldname) == {"bad":True}:
+          raise ValueError("Value for field '%s' is bad" % fieldname)
+        JSONSchemaValidator.validate_properties(self, x, fieldname, schema, properties)
+    
+    schema = {"type":"object", "properties":{"a":{"type":"object", "properties":{}, "optional":True}}}
+    compiler = StackCompiler(CheckedValidator(True))
+    compiler.shallow = 0
+    compiled = compiler.compile(schema)
+    compiled.validate({"a":{}})
+    self.assertRaises(ValueError, compiled.validate, {"a":{"bad":True}})
+    self.assertRaises(jsonschema.SchemaError, self._stack, {"type":1})
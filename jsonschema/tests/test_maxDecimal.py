@@ -34,4 +34,29 @@ class TestMaxDecimal(TestCase):
     except ValueError:
       pass
     else:
-      self.fail("Expected failure for %s" % repr(None))
\ No newline at end of file
+      self.fail("Expected failure for %s" % repr(None))
+  
+  def test_maxDecimal_numbers(self):
+    from decimal import Decimal
+    schema = {"maxDecimal":2}
+    passing = [10, -12345, 10**30, 1.5, 0.29, 1.0, 1e+20, -0.0, Decimal("1.50"),
+               Decimal("1.500"), Decimal("1E+3"), float("inf")]
+    # str() writes 0.1+0.2 as 0.3 and 1.0000000000001 as 1.0.
+    failing = [1.255, 0.1+0.2, 1.0000000000001, 1e-05, 1.5e-07, Decimal("1.555"), Decimal("1E-7")]
+    for backend in ("tree", "codegen", "stack"):
+      compiled = jsonschema.compile(schema, backend=backend)
+      for x in passing:
+        compiled.validate(x)
+        self.assertTrue(compiled.is_valid(x), "%s: %r" % (backend, x))
+      for x in failing:
+        self.assertRaises(ValueError, compiled.validate, x)
+        self.assertFalse(compiled.is_valid(x), "%s: %r" % (backend, x))
+    for x in passing:
+      jsonschema.JSONSchemaValidator().validate(x, schema)
+    for x in failing:
+      self.assertRaises(ValueError, jsonschema.JSONSchemaValidator().validate, x, schema)
+  
+  def test_maxDecimal_zero(self):
+    schema = {"items":{"maxDecimal":0}}
+    jsonschema.validate([1, 2.0, 1e+100], schema)
+    self.assertRaises(ValueError, jsonschema.validate, [1, 0.5], schema)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+import pickle
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.errors import SchemaError
+from jsonschema.metaschema import schema_errors
+from jsonschema.validator import JSONSchemaValidator
+
+class TestMetaschema(TestCase):
+
+  def test_valid(self):
+    schema = {
+      "id": "test",
+      "title": "Test",
+      "type": ["object", {"type":"string", "maxLength":10}],
+      "properties": {
+        "name": {"type":"string", "pattern":"^[a-z]+$", "optional":True},
+        "tags": {"items":[{"type":"string"}, None], "minItems":1},
+        "size": {"type":"number", "minimum":0, "maximum":1.5, "maxDecimal":2},
+        "kind": {"enum":["a", "b"], "requires":"name", "disallow":"null"}
+      },
+      "additionalProperties": {"type":"boolean"}
+    }
+    self.assertEqual(schema_errors(schema), [])
+    self.assertEqual(schema_errors(None), [])
+    jsonschema.check_schema(schema)
+  
+  def test_all_errors(self):
+    schema = {
+      "title": 1,
+      "properties": {
+        "a": {"enum":"a"},
+        "b": {"items":[{"description":1}]},
+        "c": "string"
+      },
+      "additionalProperties": {"type":1}
+    }
+    errors = schema_errors(schema)
+    paths = [path for path, error in errors]
+    paths.sort()
+    self.assertEqual(paths, ["$", "$.additionalProperties", "$.properties.a",
+                             "$.properties.b.items[0]", "$.properties.c"])
+  
+  def test_compile(self):
+    for backend in ("tree", "codegen"):
+      self.assertRaises(SchemaError, jsonschema.compile, {"properties":[]}, backend=backend)
+    self.assertRaises(SchemaError, jsonschema.validate, "test", {"enum":"test"})
+    self.assertRaises(SchemaError, jsonschema.validate, "test", {"id":"$"})
+    self.assertRaises(SchemaError, jsonschema.is_valid, "test", "notaschema")
+  
+  def test_overridden(self):
+    class TitleValidator(JSONSchemaValidator):
+      def validate_title(self, x, fieldname, schema, title=None):
+        return x
+    
+    schema = {"title":1, "properties":{"a":{"title":[]}}}
+    self.assertEqual(schema_errors(schema, TitleValidator()), [])
+    jsonschema.validate({"a":1}, schema, validator_cls=TitleValidator)
+    self.assertRaises(SchemaError, jsonschema.validate, {"a":1}, schema)
+  
+  def test_pickle(self):
+    try:
+      jsonschema.check_schema({"title":1})
+    except SchemaError, e:
+      copy = pickle.loads(pickle.dumps(e))
+      self.assertEqual(str(copy), str(e))
+      self.assertEqual(len(copy.errors), 1)
+    else:
+      self.fail("Expected failure")
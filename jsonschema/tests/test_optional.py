@@ -42,4 +42,33 @@ class TestOptional(TestCase):
     except ValueError:
       pass
     else:
-      self.fail("Expected failure for %s" % repr(None))
\ No newline at end of file
+      self.fail("Expected failure for %s" % repr(None))
+  
+  def test_optional_wide(self):
+    props = dict([("prop%03d" % i, {"type":"integer", "optional":i % 2 == 0}) for i in range(100)])
+    props["withdefault"] = {"type":"integer", "default":1}
+    schema = {"type":"object", "properties":props, "additionalProperties":False}
+    
+    x = dict([("prop%03d" % i, i) for i in range(1, 100, 2)])
+    documents = [x, dict(x, prop042=1), dict(x, prop001="a"), dict(x, other=1)]
+    documents.extend([dict([item for item in x.items() if item[0] != name])
+                      for name in ("prop001", "prop051", "prop099")])
+    
+    for backend in ("tree", "codegen"):
+      compiled = jsonschema.compile(schema, backend=backend)
+      for document in documents:
+        expected = None
+        try:
+          jsonschema.JSONSchemaValidator().validate(dict(document), schema)
+        except ValueError, e:
+          expected = str(e)
+        
+        document = dict(document)
+        self.assertEqual(compiled.is_valid(dict(document)), expected is None)
+        try:
+          compiled.validate(document)
+        except ValueError, e:
+          self.assertEqual(str(e), expected)
+        else:
+          self.assertEqual(expected, None)
+          self.assertEqual(document["withdefault"], 1)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+import os, tempfile
+from unittest import TestCase
+
+import jsonschema
+from jsonschema import parallel
+
+class TestParallel(TestCase):
+
+  schema = {"type":"object", "properties":{"id":{"type":"integer", "maximum":100}}}
+  
+  def setUp(self):
+    fd, self.path = tempfile.mkstemp()
+    lines = []
+    for x in range(300):
+      if x % 50 == 7:
+        lines.append('')
+      lines.append('{"id":%d}' % x)
+    os.write(fd, "\n".join(lines) + "\n")
+    os.close(fd)
+  
+  def tearDown(self):
+    os.remove(self.path)
+  
+  def test_line_ranges(self):
+    content = open(self.path, 'rb').read()
+    ranges = parallel.line_ranges(self.path, 7)
+    self.assertEqual(ranges[0][0], 0)
+    self.assertEqual(ranges[-1][1], len(content))
+    for start, end in ranges:
+      self.assertTrue(start == 0 or content[start-1] == "\n")
+    for (start1, end1), (start2, end2) in zip(ranges[:-1], ranges[1:]):
+      self.assertEqual(end1, start2)
+  
+  def test_validate_file(self):
+    from jsonschema.stream import validate_lines
+    compiled = jsonschema.compile(self.schema)
+    expected = [lineno for lineno, ok, error in validate_lines(open(self.path, 'rb'), compiled) if not ok]
+    
+    failures = list(parallel.validate_file(self.path, self.schema, processes=2, chunksize=512))
+    self.assertEqual([lineno for lineno, error in failures], expected)
+    for lineno, error in failures:
+      self.assertTrue(isinstance(error, ValueError))
+  
+  def test_validate_many(self):
+    documents = [{"id":x} for x in range(250)] + [{"id":"bad"}]
+    results = list(jsonschema.validate_many(documents, self.schema, processes=2))
+    expected = list(jsonschema.validate_many(documents, self.schema))
+    
+    self.assertEqual([(index, ok) for index, ok, error in results],
+                     [(index, ok) for index, ok, error in expected])
+    self.assertEqual(len([ok for index, ok, error in results if not ok]), 150)
+  
+  def test_validate_many_deep(self):
+    # Workers validate deeply nested documents like the calling process.
+    schema = {"type":"string"}
+    data = "a"
+    for depth in range(250):
+      schema = {"type":"object", "properties":{"child":schema}}
+      data = {"child":data}
+    expected = list(jsonschema.validate_many([data, 1], schema))
+    results = list(jsonschema.validate_many([data, 1], schema, processes=2))
+    self.assertEqual([(index, ok) for index, ok, error in results],
+                     [(index, ok) for index, ok, error in expected])
+    self.assertEqual([ok for index, ok, error in results], [True, False])
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.compiler import SchemaCompiler
+from jsonschema.validator import JSONSchemaValidator
+
+class TestShapeCache(TestCase):
+
+  schema = {
+    "type": "object",
+    "properties": {
+      "name": {"type":"string", "disallow":"integer"},
+      "kind": {"enum":["a", "b"], "optional":True, "requires":"name"},
+      "size": {"type":"integer", "optional":True, "default":1},
+      "note": {"type":"string", "optional":True, "format":"text"},
+      "tags": {"type":"array", "items":{"type":"string"}, "optional":True}
+    },
+    "additionalProperties": False
+  }
+  
+  documents = [
+    {"name":"a"}, {"name":"b", "kind":"a"}, {"name":"c", "tags":["x"], "size":2},
+    {"name":"d", "note":"n"}, {"kind":"a"}, {"name":1}, {"name":"e", "other":1},
+    {"name":"f", "tags":[1]}, {"name":"g", "kind":"c", "size":"s"}, {"name":None, "kind":"a"}
+  ]
+  
+  def _errors(self, validate, documents, interactive_mode=True):
+    results = []
+    for document in documents:
+      document = dict(document)
+      try:
+        validate(document)
+      except ValueError, e:
+        results.append(str(e))
+      else:
+        results.append(document)
+    return results
+  
+  def test_same_errors(self):
+    for interactive_mode in (True, False):
+      validator = JSONSchemaValidator(interactive_mode)
+      expected = self._errors(lambda x: validator.validate(x, self.schema), self.documents)
+      compiled = jsonschema.compile(self.schema, interactive_mode=interactive_mode, shape_cache=4)
+      for index in range(3):
+        self.assertEqual(self._errors(compiled.validate, self.documents), expected)
+        self.assertEqual([compiled.is_valid(dict(x)) for x in self.documents],
+                         [type(result) == dict for result in expected])
+  
+  def test_stats(self):
+    compiled = jsonschema.compile(self.schema, shape_cache=4)
+    for index in range(5):
+      compiled.validate({"name":"a", "size":index})
+    stats = compiled.shape_stats()
+    self.assertEqual(stats["caches"], 1)
+    self.assertEqual(stats["misses"], 1)
+    self.assertEqual(stats["hits"], 4)
+    
+    # Five more shapes evict the least recently used ones.
+    for key in ["kind", "note", "tags", "other", "more"]:
+      compiled.is_valid({"name":"a", key:"b"})
+    stats = compiled.shape_stats()
+    self.assertEqual(stats["size"], 4)
+    self.assertEqual(stats["maxsize"], 4)
+    self.assertEqual(stats["evictions"], 2)
+    
+    self.assertEqual(jsonschema.compile(self.schema).shape_stats()["caches"], 0)
+  
+  def test_default(self):
+    compiled = jsonschema.compile(self.schema, shape_cache=4)
+    for index in range(2):
+      x = {"name":"a"}
+      compiled.validate(x)
+      self.assertEqual(x, {"name":"a", "size":1})
+  
+  def test_override(self):
+    # Overridden validator methods are called for absent fields too.
+    class FormatValidator(JSONSchemaValidator):
+      def validate_format(self, x, fieldname, schema, format=None):
+        if format == "text":
+          self.formats.append(fieldname)
+    
+    validator = FormatValidator()
+    validator.formats = []
+    compiled = SchemaCompiler(validator, 4).compile(self.schema)
+    for index in range(2):
+      compiled.validate({"name":"a"})
+    self.assertEqual(validator.formats, ["note", "note"])
+    self.assertEqual(compiled.shape_stats()["hits"], 1)
+  
+  def test_backend(self):
+    self.assertRaises(ValueError, jsonschema.compile, self.schema, backend="codegen", shape_cache=4)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+import os, sys, tempfile
+import simplejson
+from StringIO import StringIO
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.stream import validate_lines, iter_array, validate_array, ArrayScanner
+
+class TestValidateLines(TestCase):
+
+  schema = {"type":"object", "properties":{"id":{"type":"integer"}}}
+  
+  def test_validate_lines(self):
+    infile = StringIO('{"id":1}\n{"id":"2"}\n\n{"id":3\n{"id":4}\n')
+    results = list(validate_lines(infile, jsonschema.compile(self.schema)))
+    
+    self.assertEqual([(lineno, ok) for lineno, ok, error in results],
+                     [(1, True), (2, False), (4, False), (5, True)])
+    for lineno, ok, error in results:
+      if not ok:
+        self.assertTrue(isinstance(error, ValueError))
+
+class TestIterArray(TestCase):
+  
+  schema = {
+    "type": "array",
+    "minItems": 2,
+    "maxItems": 4,
+    "items": {"type":"object", "properties":{"id":{"type":"integer"}, "tag":{"type":"string", "optional":True, "default":"x"}}}
+  }
+  
+  def test_scanner(self):
+    text = '[1, "a,]\\"[", {"x": [1, {"y": "}"}]}, [], null] '
+    for chunksize in [1, 3, 1024]:
+      scanner = ArrayScanner(StringIO(text), chunksize)
+      self.assertTrue(scanner.start())
+      self.assertEqual([item.strip() for item in scanner.items()],
+                       ['1', '"a,]\\"["', '{"x": [1, {"y": "}"}]}', '[]', 'null'])
+  
+  def test_scanner_long_item(self):
+    # Long items are read in many chunks, with escapes split between them.
+    item = simplejson.dumps("a\\\"b" * 250000)
+    document = '[%s, 1, %s]' % (item, item)
+    for chunksize in [7, 4096]:
+      scanner = ArrayScanner(StringIO(document), chunksize)
+      self.assertTrue(scanner.start())
+      self.assertEqual([text.strip() for text in scanner.items()], [item, '1', item])
+  
+  def test_scanner_invalid(self):
+    for text in ['[1,,2]', '[1', '[1,]', '[1] 2', '[1}']:
+      scanner = ArrayScanner(StringIO(text), 2)
+      scanner.start()
+      self.assertRaises(ValueError, list, scanner.items())
+  
+  def test_iter_array(self):
+    items = list(iter_array(StringIO('[{"id":1}, {"id":2, "tag":"y"}]'), self.schema, chunksize=4))
+    self.assertEqual(items, [{"id":1, "tag":"x"}, {"id":2, "tag":"y"}])
+  
+  def test_validate_array_fail(self):
+    for text in ['[{"id":1}]', '[{"id":1}, {"id":2}, {"id":3}, {"id":4}, {"id":5}]',
+                 '[{"id":1}, {"id":"2"}]', '{"id":1}', '[{"id":1}, {"id":2}']:
+      self.assertRaises(ValueError, validate_array, StringIO(text), self.schema)
+  
+  def test_validate_array_tuple(self):
+    schema = {"items":[{"type":"integer"}, {"type":"string"}]}
+    validate_array(StringIO('[1, "a"]'), schema)
+    for text in ['[1]', '[1, "a", 2]', '[1, 2]']:
+      self.assertRaises(ValueError, validate_array, StringIO(text), schema)
+  
+  def test_validate_array_same_errors(self):
+    for text in ['[{"id":1}, {"id":"2"}]', '[{"id":1}]', '"string"']:
+      try:
+        jsonschema.validate(simplejson.loads(text), self.schema)
+      except ValueError, e:
+        expected = str(e)
+      try:
+        validate_array(StringIO(text), self.schema)
+      except ValueError, e:
+        self.assertEqual(str(e), expected)
+      else:
+        self.fail("Expected failure for %s" % text)
+  
+  def test_validate_array_unsupported(self):
+    schema = {"type":"array", "enum":[[1]]}
+    self.assertRaises(ValueError, validate_array, StringIO('[1]'), schema)
+
+class TestMain(TestCase):
+
+  def setUp(self):
+    self.files = []
+    self.stderr = sys.stderr
+    sys.stderr = StringIO()
+  
+  def tearDown(self):
+    sys.stderr = self.stderr
+    for path in self.files:
+      os.remove(path)
+  
+  def tempfile(self, content):
+    fd, path = tempfile.mkstemp()
+    os.write(fd, content)
+    os.close(fd)
+    self.files.append(path)
+    return path
+  
+  def test_main(self):
+    schemafile = self.tempfile('{"type":"string"}')
+    jsonschema.main([schemafile, self.tempfile('"mystring"')])
+    self.assertRaises(SystemExit, jsonschema.main, [schemafile, self.tempfile('1')])
+  
+  def test_main_lines(self):
+    schemafile = self.tempfile('{"type":"string"}')
+    jsonschema.main(["--lines", schemafile, self.tempfile('"a"\n"b"\n')])
+    
+    try:
+      jsonschema.main(["--lines", schemafile, self.tempfile('"a"\n1\n"c"\n2\n')])
+    except SystemExit, e:
+      self.assertEqual(e.code, 1)
+    else:
+      self.fail("Expected failure")
+    output = sys.stderr.getvalue().splitlines()
+    self.assertEqual(len(output), 2)
+    self.assertTrue(output[0].startswith("line 2: "))
+    self.assertTrue(output[1].startswith("line 4: "))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+import threading, time
+from unittest import TestCase
+
+import jsonschema
+from jsonschema.validator import JSONSchemaValidator
+
+class RefmapValidator(JSONSchemaValidator):
+  '''
+  Checks that the reference map only holds the ids of the schema
+  validated by the calling thread.
+  '''
+  
+  _schemadefault = dict(JSONSchemaValidator._schemadefault, thread=None)
+  
+  def validate_thread(self, x, fieldname, schema, thread=None):
+    if thread is not None:
+      # Let the other threads run between setting and checking the ids.
+      time.sleep(0.0001)
+      ids = [key for key in self._refmap.keys() if key != '$']
+      if ids != ["thread%d" % thread]:
+        raise ValueError("Reference map %r of thread %d is not local" % (ids, thread))
+    return x
+
+class TestThreads(TestCase):
+  
+  def run_threads(self, validate):
+    failures = []
+    def run(index):
+      schema = {"id":"thread%d" % index, "thread":index, "type":"object"}
+      try:
+        for x in range(20):
+          validate({}, schema)
+      except ValueError, e:
+        failures.append(e)
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(8)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(failures, [])
+  
+  def test_shared_validator(self):
+    validator = RefmapValidator()
+    self.run_threads(validator.validate)
+  
+  def test_shared_compiled(self):
+    validator = RefmapValidator()
+    compiled = {}
+    for index in range(8):
+      schema = {"id":"thread%d" % index, "thread":index, "type":"object"}
+      compiled[index] = jsonschema.compile(schema, RefmapValidator)
+    # All compiled schemas share one validator instance.
+    for each in compiled.values():
+      each.validator = validator
+    self.run_threads(lambda data, schema: compiled[schema["thread"]].validate(data))
+  
+  def test_refmap(self):
+    validator = JSONSchemaValidator()
+    schema = {"id":"test", "type":"object"}
+    validator.validate({}, schema)
+    self.assertTrue(validator._refmap["$"] is schema)
+    self.assertTrue(validator._refmap["test"] is schema)
+  
+  def test_subclass_init(self):
+    # Subclasses that don't call JSONSchemaValidator.__init__ still work.
+    class InitValidator(RefmapValidator):
+      def __init__(self, interactive_mode=True):
+        self._interactive_mode = interactive_mode
+    schema = {"id":"test", "type":"object"}
+    validator = InitValidator()
+    validator.validate({}, schema)
+    self.assertTrue(validator._refmap["test"] is schema)
+    jsonschema.validate({}, schema, InitValidator)
+    self.run_threads(InitValidator().validate)
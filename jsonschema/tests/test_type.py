@@ -154,4 +154,59 @@ class TestType(TestCase):
           try:
             jsonschema.validate(x, y)
           except ValueError:
-            self.fail("Unexpected failure: %s" % e)
\ No newline at end of file
+            self.fail("Unexpected failure: %s" % e)
+    
+    def test_union(self):
+      variants = [
+        {"type":"object", "properties":{"kind":{"enum":["a"]}, "a":{"type":"integer"}}},
+        {"type":"object", "properties":{"kind":{"enum":["b"]}, "b":{"type":"string"}}},
+        "null", "integer"
+      ]
+      schema = {"type":"array", "items":{"type":variants}}
+      validator = jsonschema.JSONSchemaValidator()
+      for backend in ("tree", "codegen"):
+        compiled = jsonschema.compile(schema, backend=backend)
+        compiled.validate([{"kind":"a", "a":1}, {"kind":"b", "b":"x"}, None, 1])
+        for x in [[{"kind":"a", "a":"x"}], [{"kind":"b"}], [{"a":1}], ["a"], [1.5]]:
+          self.assertFalse(compiled.is_valid(x))
+          try:
+            validator.validate(x, schema)
+          except ValueError, e:
+            expected = str(e)
+          try:
+            compiled.validate(x)
+          except ValueError, e:
+            self.assertEqual(str(e), expected)
+          else:
+            self.fail("Expected failure for %s" % repr(x))
+    
+    def test_union_default(self):
+      # Schema alternatives that add defaults are still tried in order.
+      schema = {"type":[{"type":"object", "properties":{"a":{"default":1, "optional":True}, "b":{"type":"integer"}}}, "object"]}
+      for backend in ("tree", "codegen"):
+        x = {"b":"x"}
+        jsonschema.compile(schema, backend=backend).validate(x)
+        self.assertEqual(x, {"a":1, "b":"x"})
+    
+    def test_union_discriminator(self):
+      variants = [
+        {"type":"object", "properties":{"kind":{"enum":["click", "tap"]}, "x":{"type":"integer"}}},
+        {"type":"object", "properties":{"kind":{"enum":["key"]}, "key":{"type":"string"}}},
+        {"type":"object", "properties":{"kind":{"enum":["scroll"]}, "x":{"type":"integer", "optional":True}}}
+      ]
+      schema = {"type":"array", "items":{"type":variants + ["string"]}}
+      for backend in ("tree", "codegen"):
+        compiled = jsonschema.compile(schema, backend=backend)
+        self.assertEqual(len(compiled.discriminators), 1)
+        discriminator = compiled.discriminators[0]
+        self.assertEqual(discriminator.property, "kind")
+        self.assertEqual(discriminator.index, {"click":[0], "tap":[0], "key":[1], "scroll":[2]})
+        
+        self.assertTrue(compiled.is_valid([{"kind":"tap", "x":1}, {"kind":"key", "key":"a"},
+                                           {"kind":"scroll"}, {"kind":None, "key":"a"}, "a"]))
+        for x in [{"kind":"key", "x":1}, {"kind":"other"}, {"x":1}, {"kind":["click"], "x":1}, 1]:
+          self.assertFalse(compiled.is_valid([x]), repr(x))
+      
+      # Alternatives that don't all require the property have no index.
+      variants[2]["properties"]["kind"]["optional"] = True
+      self.assertEqual(jsonschema.compile(schema).discriminators, [])
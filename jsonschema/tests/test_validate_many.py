@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase
+
+import jsonschema
+
+class TestValidateMany(TestCase):
+
+  schema = {
+    "type": "object",
+    "properties": {
+      "id": {"type":"integer"},
+      "name": {"type":"string", "optional":True, "default":"unknown"}
+    }
+  }
+  
+  def test_validate_many_pass(self):
+    data = [{"id":1}, {"id":2, "name":"test"}]
+    results = list(jsonschema.validate_many(data, self.schema))
+    self.assertEqual(results, [(0, True, None), (1, True, None)])
+    self.assertEqual(data[0]["name"], "unknown")
+  
+  def test_validate_many_fail(self):
+    data = [{"id":1}, {"id":"2"}, {}, {"id":4}]
+    results = list(jsonschema.validate_many(data, self.schema))
+    
+    self.assertEqual([ok for index, ok, error in results], [True, False, False, True])
+    self.assertEqual([index for index, ok, error in results], [0, 1, 2, 3])
+    for index, ok, error in results:
+      if ok:
+        self.assertEqual(error, None)
+      else:
+        self.assertTrue(isinstance(error, ValueError))
+        self.assertRaises(ValueError, jsonschema.validate, data[index], self.schema)
+  
+  def test_validate_many_generator(self):
+    def documents():
+      for x in range(100):
+        yield {"id":x}
+    results = jsonschema.validate_many(documents(), self.schema, interactive_mode=False)
+    count = 0
+    for index, ok, error in results:
+      self.assertTrue(ok)
+      count += 1
+    self.assertEqual(count, 100)
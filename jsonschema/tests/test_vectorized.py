@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+from unittest import TestCase, skipIf
+
+import jsonschema
+from jsonschema import vectorized
+from jsonschema.validator import JSONSchemaValidator
+
+class TestVectorized(TestCase):
+  
+  schema = {"type":"array", "items":{"type":"number", "minimum":-10, "maximum":10, "maxDecimal":2}}
+  
+  def _errors(self, data):
+    '''
+    Returns the errors of the data with and without the vectorized checks.
+    '''
+    errors = []
+    numpy = vectorized.numpy
+    for module in (numpy, None):
+      vectorized.numpy = module
+      try:
+        compiled = [jsonschema.compile(self.schema, backend=backend)
+                    for backend in ("tree", "codegen")]
+      finally:
+        vectorized.numpy = numpy
+      for each in compiled:
+        try:
+          each.validate(data)
+        except ValueError, e:
+          errors.append((str(e), e.keyword, each.is_valid(data)))
+        else:
+          errors.append((None, None, each.is_valid(data)))
+    return errors
+  
+  def test_fallback(self):
+    numpy = vectorized.numpy
+    vectorized.numpy = None
+    try:
+      self.assertEqual(vectorized.numeric_filter(JSONSchemaValidator(), self.schema["items"]), None)
+      compiled = jsonschema.compile(self.schema)
+      compiled.validate([1.25] * vectorized.MIN_LENGTH)
+      self.assertFalse(compiled.is_valid([1.25] * vectorized.MIN_LENGTH + [11]))
+    finally:
+      vectorized.numpy = numpy
+  
+  @skipIf(vectorized.numpy is None, "NumPy is not available")
+  def test_same_errors(self):
+    data = [0.5, -1.25, 3.0, 9.99, -10.0] * 1000
+    for index in (0, 1, 2500, len(data)-1):
+      for invalid in (-10.5, 11, 1.255, 1e-05, 0.0, float("nan"), float("inf"), 1.5, 100, -99, True, "a", 2**70):
+        data[index], saved = invalid, data[index]
+        errors = self._errors(data)
+        self.assertEqual(errors[:2], errors[2:], repr((index, invalid)))
+        data[index] = saved
+    self.assertEqual(self._errors(data), [(None, None, True)] * 4)
+  
+  @skipIf(vectorized.numpy is None, "NumPy is not available")
+  def test_select(self):
+    validator = JSONSchemaValidator()
+    select = vectorized.numeric_filter(validator, self.schema["items"])
+    data = [1.5] * vectorized.MIN_LENGTH
+    self.assertEqual(select(data), [])
+    data[10] = 12.0
+    data[20] = 0.001
+    self.assertEqual(select(data), [12.0, 0.001])
+    # Ints have no decimal places.
+    data[40] = 7
+    self.assertEqual(select(data), [12.0, 0.001])
+    # Short lists and lists of other types are checked item by item.
+    self.assertTrue(select(data[:10]) is not None)
+    data[30] = "a"
+    self.assertTrue(select(data) is data)
+    
+    self.assertEqual(vectorized.numeric_filter(validator, {"type":"string", "maxLength":2}), None)
+    self.assertEqual(vectorized.numeric_filter(validator, {"minimum":0, "enum":[1, 2]}), None)
+    self.assertEqual(vectorized.numeric_filter(validator, {"maximum":2**60}), None)
+    # Ints too large for floats are checked item by item, even among floats.
+    select = vectorized.numeric_filter(validator, {"type":"number", "maximum":2**53})
+    for large in (2**53+1, -2**53-1):
+      data = [1.5] * vectorized.MIN_LENGTH + [large]
+      self.assertTrue(select(data) is data)
+    compiled = jsonschema.compile({"items":{"type":"number", "maximum":2**53}})
+    self.assertFalse(compiled.is_valid([1.5] * vectorized.MIN_LENGTH + [2**53+1]))
+  
+  def test_strings_same_errors(self):
+    schema = {"type":"array", "items":{"type":"string", "minLength":1, "maxLength":4, "pattern":"^[a-z]+$"}}
+    data = ["a", "ab", u"abc", "abcd"] * 10
+    minstrings = vectorized.MIN_STRINGS
+    for index in (0, 1, 20, len(data)-1):
+      for invalid in ("", "abcde", "A", "a1", u"é", None, 1, ["a"]):
+        data[index], saved = invalid, data[index]
+        errors = []
+        for size in (minstrings, len(data) + 1):
+          vectorized.MIN_STRINGS = size
+          try:
+            for backend in ("tree", "codegen"):
+              compiled = jsonschema.compile(schema, backend=backend)
+              try:
+                compiled.validate(data)
+              except ValueError, e:
+                errors.append((str(e), compiled.is_valid(data)))
+          finally:
+            vectorized.MIN_STRINGS = minstrings
+        self.assertEqual(len(errors), 4, repr(invalid))
+        self.assertEqual(errors[:2], errors[2:], repr((index, invalid)))
+        data[index] = saved
+  
+  def test_string_filter(self):
+    validator = JSONSchemaValidator()
+    select = vectorized.string_filter(validator, {"minLength":2, "pattern":"^a"})
+    data = ["ab"] * vectorized.MIN_STRINGS
+    self.assertEqual(select(data), [])
+    data[3] = "a"
+    data[5] = "bc"
+    self.assertEqual(select(data), ["a", "bc"])
+    data[7] = 1
+    self.assertTrue(select(data) is data)
+    
+    self.assertEqual(vectorized.string_filter(validator, {"type":"integer", "minLength":1}), None)
+    self.assertEqual(vectorized.string_filter(validator, {"minLength":1, "enum":["a"]}), None)
+    self.assertEqual(vectorized.items_filter(validator, {"maxLength":1}) is not None, True)
+  
+  def test_invalid_indexes(self):
+    schema = {"type":"string", "maxLength":2}
+    data = ["a", "abc", "ab", "abcd"] * 10
+    self.assertEqual(vectorized.invalid_indexes(data, schema), range(1, 40, 2))
+    self.assertEqual(vectorized.invalid_indexes(data, schema, first=True), [1])
+    self.assertEqual(vectorized.invalid_indexes(data[:2], schema), [1])
+    # Other schemas test every item.
+    self.assertEqual(vectorized.invalid_indexes([1, "a", None, 2], {"type":"integer"}), [1, 2])
+    self.assertEqual(vectorized.invalid_indexes(["a"] * 20, schema), [])
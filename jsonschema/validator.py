@@ -6,12 +6,37 @@
 #TODO: Support references
 #TODO: Support inline schema
 
-import types, sys, re, copy
+import types, sys, copy, threading, weakref
 
-class JSONSchemaValidator:
+from jsonschema import decimals
+from jsonschema.cache import compile_pattern
+from jsonschema.canonical import first_duplicate
+from jsonschema.errors import ValidationError
+
+# The dispatch plan of each validator class. See
+# JSONSchemaValidator._dispatch_plan.
+_plans = weakref.WeakKeyDictionary()
+
+class ValidationContext:
+  '''
+  The state of a single validation call. Holds the map of schema ids to
+  the schema objects found while validating.
+  '''
+  
+  def __init__(self, schema):
+    self.refmap = {
+      '$': schema
+    }
+
+class JSONSchemaValidator(object):
   '''
   Implementation of the json-schema validator that adheres to the 
   JSON Schema Proposal 2nd Draft.
+  
+  The state of a validation call is kept in a ValidationContext that is
+  local to the calling thread, so a validator instance can be used by
+  many threads at the same time. Subclasses that override __init__ must
+  call the __init__ method of this class.
   '''
   
   # Map of schema types to their equivalent in the python types module
@@ -36,6 +61,7 @@ class JSONSchemaValidator:
     "additionalProperties": None,
     "requires": None,
     "identity": None,
+    "uniqueItems": None,
     "minimum": None,
     "maximum": None,
     "minItems": None,
@@ -57,12 +83,54 @@ class JSONSchemaValidator:
     "extends": None
   }
   
-  _refmap = {}
+  # Schema properties that must be validated even when they are not present
+  # in the schema. A missing "optional" property means the field is required.
+  _alwaysvalidate = ("optional",)
   
   _interactive_mode = True
   
   def __init__(self, interactive_mode=True):
     self._interactive_mode = interactive_mode
+    self._local = threading.local()
+  
+  def _get_local(self):
+    '''
+    Returns the thread local state of the validator, which is created on
+    first use for subclasses that don't call JSONSchemaValidator.__init__.
+    '''
+    local = getattr(self, "_local", None)
+    if local is None:
+      # setdefault keeps the state created first if two threads get here.
+      local = self.__dict__.setdefault("_local", threading.local())
+    return local
+  
+  def _begin(self, schema):
+    '''
+    Starts a validation call against the given schema in the calling
+    thread. The context of the call is only created when it is used.
+    '''
+    local = self._get_local()
+    local.schema = schema
+    local.context = None
+  
+  def _get_context(self):
+    '''
+    Returns the validation context of the calling thread.
+    '''
+    local = self._get_local()
+    context = getattr(local, "context", None)
+    if context is None:
+      context = local.context = ValidationContext(getattr(local, "schema", None))
+    return context
+  
+  def _get_refmap(self):
+    return self._get_context().refmap
+  
+  def _set_refmap(self, refmap):
+    self._get_context().refmap = refmap
+  
+  # The schema reference map of the current validation call.
+  _refmap = property(_get_refmap, _set_refmap)
   
   def validate_id(self, x, fieldname, schema, ID=None):
     '''
@@ -95,7 +163,16 @@ class JSONSchemaValidator:
       if type(converted_fieldtype) == types.ListType:
         # Match if type matches any one of the types in the list
         datavalid = False
+        # Python types are matched without calling validate_type unless a
+        # subclass has overridden it.
+        inline = not self._is_overridden("type")
         for eachtype in converted_fieldtype:
+          if inline and self._is_python_type(eachtype):
+            if eachtype is None or type(value) == eachtype or \
+               (type(eachtype) == types.ListType and type(value) in eachtype):
+              datavalid = True
+              break
+            continue
           try:
             self.validate_type(x, fieldname, eachtype, eachtype)
             datavalid = True
@@ -103,7 +180,7 @@ class JSONSchemaValidator:
           except ValueError:
             pass
         if not datavalid:
-          raise ValueError("Value %r for field '%s' is not of type %r" % (value, fieldname, fieldtype))
+          raise ValidationError("Value %r for field '%s' is not of type %r", (value, fieldname, fieldtype), "type", fieldname, value, fieldtype)
       elif type(converted_fieldtype) == types.DictType:
         try:
           self.__validate(fieldname, x, converted_fieldtype)
@@ -111,7 +188,7 @@ class JSONSchemaValidator:
           raise e
       else:
         if type(value) != converted_fieldtype:
-          raise ValueError("Value %r for field '%s' is not of type %r" % (value, fieldname, fieldtype))
+          raise ValidationError("Value %r for field '%s' is not of type %r", (value, fieldname, fieldtype), "type", fieldname, value, fieldtype)
     return x
   
   def validate_properties(self, x, fieldname, schema, properties=None):
@@ -124,8 +201,12 @@ class JSONSchemaValidator:
       if value is not None:
         if type(value) == types.DictType:
           if type(properties) == types.DictType:
-            for eachProp in properties.keys():
-              self.__validate(eachProp, value, properties.get(eachProp))
+            try:
+              for eachProp in properties.keys():
+                self.__validate(eachProp, value, properties.get(eachProp))
+            except ValidationError, e:
+              e.path.insert(0, fieldname)
+              raise
           else:
             raise ValueError("Properties definition of field '%s' is not an object" % fieldname)
     return x
@@ -141,19 +222,24 @@ class JSONSchemaValidator:
         if type(value) == types.ListType:
           if type(items) == types.ListType:
             if len(items) == len(value):
+              # A single container is reused for all of the items.
+              item = {}
               for itemIndex in range(len(items)):
+                item["_data"] = value[itemIndex]
                 try:
-                  self.validate(value[itemIndex], items[itemIndex])
+                  self.__validate("_data", item, items[itemIndex])
                 except ValueError, e:
-                  raise ValueError("Failed to validate field '%s' list schema: %r" % (fieldname, e.message))
+                  raise ValidationError("Failed to validate field '%s' list schema: %r", (fieldname, e), "items", fieldname, value, items, e)
             else:
-              raise ValueError("Length of list %r for field '%s' is not equal to length of schema list" % (value, fieldname))
+              raise ValidationError("Length of list %r for field '%s' is not equal to length of schema list", (value, fieldname), "items", fieldname, value, items)
           elif type(items) == types.DictType:
+            item = {}
             for eachItem in value:
+                item["_data"] = eachItem
                 try:
-                  self._validate(eachItem, items)
+                  self.__validate("_data", item, items)
                 except ValueError, e:
-                  raise ValueError("Failed to validate field '%s' list schema: %r" % (fieldname, e.message))
+                  raise ValidationError("Failed to validate field '%s' list schema: %r", (fieldname, e), "items", fieldname, value, items, e)
           else:
             raise ValueError("Properties definition of field '%s' is not a list or an object" % fieldname)
     return x
@@ -163,8 +249,8 @@ class JSONSchemaValidator:
     Validates that the given field is present if optional is false
     '''
     # Make sure the field is present
-    if fieldname not in x.keys() and not optional:
-      raise ValueError("Required field '%s' is missing" % fieldname)
+    if not optional and fieldname not in x:
+      raise ValidationError("Required field '%s' is missing", (fieldname,), "optional", fieldname)
     return x
   
   def validate_additionalProperties(self, x, fieldname, schema, additionalProperties=None):
@@ -189,8 +275,12 @@ class JSONSchemaValidator:
             # If additionalProperties is the boolean value False then we 
             # don't accept any additional properties.
             if type(additionalProperties) == types.BooleanType and additionalProperties == False:
-              raise ValueError("Additional properties not defined by 'properties' are not allowed in field '%s'" % fieldname)
-            self.__validate(eachProperty, value, additionalProperties)
+              raise ValidationError("Additional properties not defined by 'properties' are not allowed in field '%s'", (fieldname,), "additionalProperties", fieldname, value, additionalProperties)
+            try:
+              self.__validate(eachProperty, value, additionalProperties)
+            except ValidationError, e:
+              e.path.insert(0, fieldname)
+              raise
       else:
         raise ValueError("additionalProperties schema definition for field '%s' is not an object" % fieldname)
     return x
@@ -198,10 +288,29 @@ class JSONSchemaValidator:
   def validate_requires(self, x, fieldname, schema, requires=None):
     if x.get(fieldname) is not None and requires is not None:
       if x.get(requires) is None:
-        raise ValueError("Field '%s' is required by field '%s'" % (requires, fieldname))
+        raise ValidationError("Field '%s' is required by field '%s'", (requires, fieldname), "requires", fieldname, x.get(fieldname), requires)
     return x
   
   def validate_identity(self, x, fieldname, schema, unique=False):
+    '''
+    Validates that the items of the list are all different if unique is
+    True. Numbers are compared by value, so 1 and 1.0 are the same item,
+    but booleans are not numbers here: true and 1 are different items.
+    '''
+    return self._validate_unique(x, fieldname, "identity", unique)
+  
+  def validate_uniqueItems(self, x, fieldname, schema, uniqueItems=False):
+    '''
+    The name later drafts give to the identity property.
+    '''
+    return self._validate_unique(x, fieldname, "uniqueItems", uniqueItems)
+  
+  def _validate_unique(self, x, fieldname, schemaprop, unique):
+    value = x.get(fieldname)
+    if unique and type(value) == types.ListType:
+      duplicate = first_duplicate(value)
+      if duplicate is not None:
+        raise ValidationError("Value %r for field '%s' has equal items at indexes %d and %d", (value, fieldname) + duplicate, schemaprop, fieldname, value, unique)
     return x
   
   def validate_minimum(self, x, fieldname, schema, minimum=None):
@@ -213,9 +322,9 @@ class JSONSchemaValidator:
       value = x.get(fieldname)
       if value is not None:
         if type(value) in (types.IntType,types.FloatType) and value < minimum:
-          raise ValueError("Value %r for field '%s' is less than minimum value: %f" % (value, fieldname, minimum))
+          raise ValidationError("Value %r for field '%s' is less than minimum value: %f", (value, fieldname, minimum), "minimum", fieldname, value, minimum)
         elif type(value) == types.ListType and len(value) < minimum:
-          raise ValueError("Value %r for field '%s' has fewer values than the minimum: %f" % (value, fieldname, minimum))
+          raise ValidationError("Value %r for field '%s' has fewer values than the minimum: %f", (value, fieldname, minimum), "minimum", fieldname, value, minimum)
     return x
   
   def validate_maximum(self, x, fieldname, schema, maximum=None):
@@ -227,9 +336,9 @@ class JSONSchemaValidator:
       value = x.get(fieldname)
       if value is not None:
         if type(value) in (types.IntType, types.FloatType) and value > maximum:
-          raise ValueError("Value %r for field '%s' is greater than maximum value: %f" % (value, fieldname, maximum))
+          raise ValidationError("Value %r for field '%s' is greater than maximum value: %f", (value, fieldname, maximum), "maximum", fieldname, value, maximum)
         elif type(value) == types.ListType and len(value) > maximum:
-          raise ValueError("Value %r for field '%s' has more values than the maximum: %f" % (value, fieldname, maximum))
+          raise ValidationError("Value %r for field '%s' has more values than the maximum: %f", (value, fieldname, maximum), "maximum", fieldname, value, maximum)
     return x
   
   def validate_minItems(self, x, fieldname, schema, minitems=None):
@@ -241,7 +350,7 @@ class JSONSchemaValidator:
       value = x.get(fieldname)
       if value is not None:
         if type(value) == types.ListType and len(value) < minitems:
-          raise ValueError("Value %r for field '%s' must have a minimum of %d items" % (fieldname, fieldname, minitems))
+          raise ValidationError("Value %r for field '%s' must have a minimum of %d items", (fieldname, fieldname, minitems), "minItems", fieldname, value, minitems)
     return x
   
   def validate_maxItems(self, x, fieldname, schema, maxitems=None):
@@ -253,7 +362,7 @@ class JSONSchemaValidator:
       value = x.get(fieldname)
       if value is not None:
         if type(value) == types.ListType and len(value) > maxitems:
-          raise ValueError("Value %r for field '%s' must have a maximum of %d items" % (value, fieldname, maxitems))
+          raise ValidationError("Value %r for field '%s' must have a maximum of %d items", (value, fieldname, maxitems), "maxItems", fieldname, value, maxitems)
     return x
   
   def validate_pattern(self, x, fieldname, schema, pattern=None):
@@ -265,9 +374,9 @@ class JSONSchemaValidator:
     if pattern is not None and \
        value is not None and \
        self._is_string_type(value):
-      p = re.compile(pattern)
+      p = compile_pattern(pattern)
       if not p.match(value):
-        raise ValueError("Value %r for field '%s' does not match regular expression '%s'" % (value, fieldname, pattern))
+        raise ValidationError("Value %r for field '%s' does not match regular expression '%s'", (value, fieldname, pattern), "pattern", fieldname, value, pattern)
     return x
   
   def validate_maxLength(self, x, fieldname, schema, length=None):
@@ -280,7 +389,7 @@ class JSONSchemaValidator:
        value is not None and \
        self._is_string_type(value) and \
        len(value) > length:
-      raise ValueError("Length of value %r for field '%s' must be less than or equal to %f" % (value, fieldname, length))
+      raise ValidationError("Length of value %r for field '%s' must be less than or equal to %f", (value, fieldname, length), "maxLength", fieldname, value, length)
     return x
     
   def validate_minLength(self, x, fieldname, schema, length=None):
@@ -293,7 +402,7 @@ class JSONSchemaValidator:
        value is not None and \
        self._is_string_type(value) and \
        len(value) < length:
-      raise ValueError("Length of value %r for field '%s' must be more than or equal to %f" % (value, fieldname, length))
+      raise ValidationError("Length of value %r for field '%s' must be more than or equal to %f", (value, fieldname, length), "minLength", fieldname, value, length)
     return x
   
   def validate_enum(self, x, fieldname, schema, options=None):
@@ -306,7 +415,7 @@ class JSONSchemaValidator:
       if not type(options) == types.ListType:
         raise ValueError("Enumeration %r for field '%s' is not a list type", (options, fieldname))
       if value not in options:
-        raise ValueError("Value %r for field '%s' is not in the enumeration: %r" % (value, fieldname, options))
+        raise ValidationError("Value %r for field '%s' is not in the enumeration: %r", (value, fieldname, options), "enum", fieldname, value, options)
     return x
   
   def validate_options(self, x, fieldname, schema, options=None):
@@ -340,7 +449,7 @@ class JSONSchemaValidator:
     Adds default data to the original json document if the document is
     not readonly
     '''
-    if self._interactive_mode and fieldname not in x.keys() and default is not None:
+    if self._interactive_mode and fieldname not in x and default is not None:
       if not schema.get("readonly"):
         x[fieldname] = default
     return x
@@ -351,13 +460,13 @@ class JSONSchemaValidator:
   def validate_maxDecimal(self, x, fieldname, schema, maxdecimal=None):
     '''
     Validates that the value of the given field has less than or equal
-    to the maximum number of decimal places given
+    to the maximum number of decimal places given. The decimal places of
+    numbers are counted from their value, see jsonschema.decimals.
     '''
     value = x.get(fieldname)
     if maxdecimal is not None and value is not None:
-      maxdecstring = str(value)
-      if len(maxdecstring[maxdecstring.find(".")+1:]) > maxdecimal:
-        raise ValueError("Value %r for field '%s' must not have more than %d decimal places" % (value, fieldname, maxdecimal))
+      if not decimals.has_max_places(value, maxdecimal):
+        raise ValidationError("Value %r for field '%s' must not have more than %d decimal places", (value, fieldname, maxdecimal), "maxDecimal", fieldname, value, maxdecimal)
     return x
   
   def validate_hidden(self, x, fieldname, schema, hidden=False):
@@ -373,7 +482,7 @@ class JSONSchemaValidator:
         self.validate_type(x, fieldname, schema, disallow)
       except ValueError:
         return x
-      raise ValueError("Value %r of type %s is disallowed for field '%s'" % (x.get(fieldname), disallow, fieldname))
+      raise ValidationError("Value %r of type %s is disallowed for field '%s'", (x.get(fieldname), disallow, fieldname), "disallow", fieldname, x.get(fieldname), disallow)
     return x
   
   def validate_extends(self, x, fieldname, schema, extends=None):
@@ -403,9 +512,7 @@ class JSONSchemaValidator:
     
     #TODO: Validate the schema object here.
     
-    self._refmap = {
-      '$': schema
-    }
+    self._begin(schema)
     # Wrap the data in a dictionary
     self._validate(data, schema)
   
@@ -430,7 +537,7 @@ class JSONSchemaValidator:
       #   if schemaprop not in new_schema:
       #     new_schema[schemaprop] = self._schemadefault[schemaprop]
       
-      for schemaprop in self._schemadefault.keys():
+      for schemaprop in self._schema_keywords(schema):
         
         validatorname = "validate_"+schemaprop
         
@@ -447,4 +554,85 @@ class JSONSchemaValidator:
   def _is_string_type(self, value):
     return type(value) in (types.StringType, types.UnicodeType)
   
-__all__ = [ 'JSONSchemaValidator' ]
\ No newline at end of file
+  def _is_python_type(self, converted_fieldtype):
+    '''
+    Returns True if the converted field type is None, a python type or a
+    list of python types.
+    '''
+    if type(converted_fieldtype) == types.ListType:
+      for eachtype in converted_fieldtype:
+        if type(eachtype) != types.TypeType:
+          return False
+      return True
+    return converted_fieldtype is None or type(converted_fieldtype) == types.TypeType
+  
+  def _is_overridden(self, schemaprop):
+    '''
+    Returns True if the validator method for the given schema property
+    has been overridden or added by a subclass.
+    '''
+    validatorname = "validate_"+schemaprop
+    method = getattr(self.__class__, validatorname, None)
+    basemethod = getattr(JSONSchemaValidator, validatorname, None)
+    if method is None or basemethod is None:
+      return method is not basemethod
+    return method.im_func is not basemethod.im_func
+  
+  def _dispatch_plan(self):
+    '''
+    Returns the position of each schema property of _schemadefault in
+    the validation order, the list and set of properties that are
+    validated even when they are missing from the schema, either because
+    the missing property has a meaning of its own or because a subclass
+    extends the validator, and a dictionary for the schema properties to
+    validate by the set of properties of a schema. The plan is computed
+    once per class.
+    '''
+    cls = self.__class__
+    plan = _plans.get(cls)
+    if plan is None:
+      order = {}
+      forced = []
+      for index, schemaprop in enumerate(self._schemadefault.keys()):
+        order[schemaprop] = index
+        if schemaprop in self._alwaysvalidate or \
+           schemaprop not in JSONSchemaValidator._schemadefault or \
+           self._is_overridden(schemaprop):
+          forced.append(schemaprop)
+      plan = _plans[cls] = (order, forced, frozenset(forced), {})
+    return plan
+  
+  def _schema_keywords(self, schema):
+    '''
+    Returns the schema properties that need to be validated for the given
+    schema. Only the properties that are present in the schema and the
+    ones that are always validated are returned, in the order of
+    _schemadefault. Properties missing from _schemadefault that have a
+    validate_<property> method, such as the ones added by subclasses, are
+    validated after them.
+    
+    Returns a tuple that is shared by all schemas with the same set of
+    properties.
+    '''
+    order, forced, forcedset, known = self._dispatch_plan()
+    keyset = frozenset(schema)
+    keywords = known.get(keyset)
+    if keywords is None:
+      keywords = list(forced)
+      extensions = []
+      for schemaprop in keyset:
+        if schemaprop in order:
+          if schemaprop not in forcedset:
+            keywords.append(schemaprop)
+        elif type(schemaprop) in (types.StringType, types.UnicodeType) and \
+             hasattr(self, "validate_"+schemaprop):
+          extensions.append(schemaprop)
+      keywords.sort(key=order.__getitem__)
+      extensions.sort()
+      keywords = tuple(keywords + extensions)
+      if len(known) >= 1024:
+        known.clear()
+      known[keyset] = keywords
+    return keywords
+
+__all__ = [ 'JSONSchemaValidator', 'ValidationContext' ]
\ No newline at end of file
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+#:coding=utf-8:
+#:tabSize=2:indentSize=2:noTabs=true:
+#:folding=explicit:collapseFolds=1:
+
+'''
+Vectorized checks of long lists of numbers and strings.
+
+Lists validated against an items schema that only checks numbers or only
+checks strings are checked as a whole: the types of all of the items are
+collected in one sweep and the checks of the schema are run over the
+whole list at once. Only the items that may fail are then passed on to
+the checks of the items schema, in order, so the first of them that
+fails raises the same error as it would if every item had been checked,
+and valid lists never run the per item checks at all.
+
+When NumPy can be imported, lists of at least ``MIN_LENGTH`` ints and
+floats validated against "type", "minimum", "maximum" and "maxDecimal"
+are converted into a single array and checked with array operations.
+
+Lists of at least ``MIN_STRINGS`` strings validated against "type",
+"minLength", "maxLength" and "pattern" are checked with the builtin map,
+min and max functions and do not need NumPy. The precompiled regular
+expression is matched against all of the strings in one loop.
+
+Lists holding items of other types are checked item by item.
+``invalid_indexes`` returns the indexes of the invalid items of a list.
+'''
+
+import re, types
+
+from jsonschema import cache, decimals
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# Lists of numbers shorter than this are checked item by item.
+MIN_LENGTH = 1000
+
+# Lists of strings shorter than this are checked item by item.
+MIN_STRINGS = 16
+
+# Schema properties with no effect on validation.
+_noops = ["optional", "default", "title", "description", "format",
+          "readonly", "transient", "hidden"]
+
+# Schema properties that can be part of a numeric items schema.
+_numeric = frozenset(["type", "minimum", "maximum", "maxDecimal"] + _noops)
+
+# Schema properties that can be part of a string items schema.
+_strings = frozenset(["type", "minLength", "maxLength", "pattern"] + _noops)
+
+_numbertypes = frozenset([types.IntType, types.FloatType])
+_stringtypes = frozenset([types.StringType, types.UnicodeType])
+
+# Numbers with a larger magnitude are not compared as floats.
+_exact = 2**53
+
+def _bound(value):
+  return type(value) in (types.IntType, types.FloatType) and abs(value) <= _exact
+
+def _accepted(validator, schema, keywords, itemtypes):
+  '''
+  Returns the types of the given item types that match the type of the
+  schema, or None if the schema has other schema properties than the
+  given ones, or overridden ones, or matches none of the item types.
+  '''
+  if type(schema) != types.DictType:
+    return None
+  for schemaprop in validator._schema_keywords(schema):
+    if schemaprop not in keywords or validator._is_overridden(schemaprop):
+      return None
+  try:
+    converted_fieldtype = validator._convert_type(schema.get("type"))
+  except ValueError:
+    return None
+  if not validator._is_python_type(converted_fieldtype):
+    return None
+  if converted_fieldtype is None:
+    return itemtypes
+  elif type(converted_fieldtype) == types.ListType:
+    if None in converted_fieldtype:
+      return itemtypes
+    typelist = converted_fieldtype
+  else:
+    typelist = [converted_fieldtype]
+  accepted = frozenset(typelist) & itemtypes
+  if not accepted:
+    return None
+  return accepted
+
+def _selector(indexes):
+  '''
+  Returns a function that takes a list and returns its items at the
+  indexes returned by the given function, or the list itself if it
+  returns None.
+  '''
+  def select(value):
+    found = indexes(value)
+    if found is None:
+      return value
+    return [value[index] for index in found]
+  return select
+
+def _numeric_indexes(validator, schema):
+  '''
+  Returns a function that takes a list and returns the sorted indexes of
+  the items that may fail the given items schema, or None if the list is
+  not checked as an array.
+  '''
+  if numpy is None:
+    return None
+  accepted = _accepted(validator, schema, _numeric, _numbertypes)
+  if accepted is None:
+    return None
+  minimum = schema.get("minimum")
+  maximum = schema.get("maximum")
+  maxdecimal = schema.get("maxDecimal")
+  scale = None
+  for limit in (minimum, maximum):
+    if limit is not None and not _bound(limit):
+      return None
+  if maxdecimal is not None:
+    scale = decimals.float_scale(maxdecimal)
+    if scale is None:
+      return None
+  if not [schemaprop for schemaprop in ("type", "minimum", "maximum", "maxDecimal")
+          if schemaprop in schema]:
+    return None
+  
+  def indexes(value):
+    if len(value) < MIN_LENGTH:
+      return None
+    kinds = frozenset(map(type, value))
+    if not kinds <= accepted:
+      return None
+    if kinds == frozenset([types.IntType]):
+      array = numpy.array(value, dtype=numpy.int64)
+      if abs(array).max() > _exact:
+        return None
+    else:
+      if types.IntType in kinds:
+        # Larger ints are rounded when they are converted to floats, so
+        # they are looked at before.
+        ints = [item for item in value if type(item) is types.IntType]
+        if max(ints) > _exact or min(ints) < -_exact:
+          return None
+      array = numpy.array(value, dtype=numpy.float64)
+    
+    failing = numpy.zeros(len(array), dtype=bool)
+    # NaN is never out of range, as in python.
+    errors = numpy.seterr(invalid="ignore")
+    try:
+      if minimum is not None:
+        failing |= array < minimum
+      if maximum is not None:
+        failing |= array > maximum
+      if scale is not None and array.dtype != numpy.int64:
+        # Ints have no decimal places and only the floats that are not
+        # the nearest float to a number with at most maxDecimal decimal
+        # places can fail, see jsonschema.decimals.
+        failing |= numpy.floor(array * scale + 0.5) / scale != array
+    finally:
+      numpy.seterr(**errors)
+    return numpy.flatnonzero(failing).tolist()
+  return indexes
+
+def _string_indexes(validator, schema):
+  '''
+  Returns a function that takes a list and returns the sorted indexes of
+  the strings that fail the given items schema, or None if the list is
+  not checked as a whole.
+  '''
+  accepted = _accepted(validator, schema, _strings, _stringtypes)
+  if accepted is None:
+    return None
+  minlength = schema.get("minLength")
+  maxlength = schema.get("maxLength")
+  pattern = schema.get("pattern")
+  regex = None
+  if pattern is not None:
+    try:
+      regex = cache.compile_pattern(pattern)
+    except (re.error, TypeError):
+      return None
+  
+  def indexes(value):
+    if len(value) < MIN_STRINGS:
+      return None
+    if not frozenset(map(type, value)) <= accepted:
+      return None
+    failing = set()
+    if minlength is not None or maxlength is not None:
+      lengths = map(len, value)
+      if minlength is not None and min(lengths) < minlength:
+        failing.update([index for index, length in enumerate(lengths)
+                        if length < minlength])
+      if maxlength is not None and max(lengths) > maxlength:
+        failing.update([index for index, length in enumerate(lengths)
+                        if length > maxlength])
+    if regex is not None:
+      matches = map(regex.match, value)
+      if None in matches:
+        failing.update([index for index, match in enumerate(matches)
+                        if match is None])
+    return sorted(failing)
+  return indexes
+
+def numeric_filter(validator, schema):
+  '''
+  Returns a function that takes a list validated against the given items
+  schema and returns the items that may fail the schema, or the list
+  itself if it is not checked as an array. Returns None if NumPy is not
+  available or the schema does not only check numbers.
+  '''
+  indexes = _numeric_indexes(validator, schema)
+  if indexes is None:
+    return None
+  return _selector(indexes)
+
+def string_filter(validator, schema):
+  '''
+  Returns a function like numeric_filter for lists of strings, or None if
+  the schema does not only check strings.
+  '''
+  indexes = _string_indexes(validator, schema)
+  if indexes is None:
+    return None
+  return _selector(indexes)
+
+def items_filter(validator, schema):
+  '''
+  Returns the numeric_filter or string_filter of the given items schema,
+  or None if it has neither.
+  '''
+  select = numeric_filter(validator, schema)
+  if select is None:
+    select = string_filter(validator, schema)
+  return select
+
+def invalid_indexes(values, schema, validator_cls=None, first=False):
+  '''
+  Returns the list of the indexes of the items of the list ``values`` that
+  are not valid against the items schema ``schema``, or only the first of
+  them if ``first`` is True. Lists of numbers and strings are checked as a
+  whole and only the items that may fail are tested one by one. Default
+  values are not added to the items.
+  
+  >>> from jsonschema.vectorized import invalid_indexes
+  >>> invalid_indexes(["ab", "abc", "", "b"] * 8, {"type":"string", "minLength":1, "pattern":"^a"})
+  [2, 3, 6, 7, 10, 11, 14, 15, 18, 19, 22, 23, 26, 27, 30, 31]
+  >>> invalid_indexes(["ab", "abc", "", "b"] * 8, {"type":"string", "minLength":1}, first=True)
+  [2]
+  '''
+  from jsonschema import compile
+  from jsonschema.validator import JSONSchemaValidator
+  if validator_cls == None:
+    validator_cls = JSONSchemaValidator
+  compiled = compile(schema, validator_cls, False)
+  candidates = None
+  for indexes in (_numeric_indexes(compiled.validator, schema),
+                  _string_indexes(compiled.validator, schema)):
+    if indexes is not None:
+      candidates = indexes(values)
+      if candidates is not None:
+        break
+  if candidates is None:
+    candidates = range(len(values))
+  
+  failing = []
+  item = {}
+  test = compiled.root.test
+  compiled.validator._begin(schema)
+  for index in candidates:
+    item["_data"] = values[index]
+    if not test(item, "_data"):
+      failing.append(index)
+      if first:
+        break
+  return failing
+
+__all__ = [ 'MIN_LENGTH', 'MIN_STRINGS', 'numeric_filter', 'string_filter',
+            'items_filter', 'invalid_indexes' ]